@@ -0,0 +1,50 @@
+import os
+from .paddle_ocr import iter_ocr
+from .ocr_cache import get_ocr_cache
+from .ocr_dedup import get_perceptual_index
+from .ocr_prefilter import get_text_prefilter
+from ..utils.ocrTools import _check_image_file
+
+
+def iter_folder_images(folder, recursive=True):
+    """
+    按路径顺序逐个列出文件夹中的图片文件，不会一次性收集整个目录树。
+    :param folder: 文件夹路径。
+    :param recursive: 是否包括子文件夹。
+    """
+    for root, dirs, files in os.walk(folder):
+        dirs.sort()
+        for name in sorted(files):
+            if _check_image_file(name):
+                yield os.path.join(root, name)
+        if not recursive:
+            break
+
+
+def iter_folder_ocr(folder, client=None, workers=4, recursive=True, cache=None, similar=None, ordered=True,
+                    max_pending=None, prefilter=None):
+    """
+    批量识别文件夹(如图片归档)中的所有图片，结果一就绪就产出。
+    默认使用全局共享的缓存、重复图片索引和文字预过滤器，索引和预过滤器只在设置中开启时存在，
+    被预过滤器跳过的图片不发送给 OCR 服务，记录中 'ocr_result' 为空并带有 'skipped': True。
+    :param folder: 文件夹路径。
+    :param recursive: 是否包括子文件夹。
+    :param cache: 使用的 OcrCache，默认为全局共享的缓存。
+    :param similar: 使用的 PerceptualIndex，默认为全局共享的索引。
+    :param prefilter: 使用的 TextPrefilter，默认为全局共享的预过滤器。
+    其余参数同 iter_ocr。
+    :return: 生成与 perform_ocr 相同格式的记录，'file' 为图片路径。
+    """
+    cache = cache or get_ocr_cache()
+    similar = similar or get_perceptual_index()
+    prefilter = prefilter or get_text_prefilter()
+    images = iter_folder_images(folder, recursive)
+    yield from iter_ocr(images, client, workers, cache=cache, ordered=ordered, max_pending=max_pending,
+                        similar=similar, prefilter=prefilter)
+
+
+def perform_folder_ocr(folder, client=None, workers=4, recursive=True, cache=None, similar=None, prefilter=None):
+    """
+    识别文件夹中的所有图片，返回按路径排序的识别记录列表。
+    """
+    return list(iter_folder_ocr(folder, client, workers, recursive, cache, similar, prefilter=prefilter))
@@ -0,0 +1,131 @@
+import time
+import hashlib
+import importlib
+import threading
+from ..common.ocr_result import OcrResult
+
+
+class OcrError(Exception):
+    """ OCR 服务返回 err_no != 0，或后端无法完成识别 """
+
+
+class OcrBackend:
+    """
+    OCR 后端接口。perform_ocr、iter_ocr 等只依赖这里的方法，任何后端都可以作为它们的 client。
+    子类至少需要实现 predict_batch。
+    """
+
+    # 缓存键的命名空间，不同后端、模型的结果互不混用
+    cache_namespace = ''
+
+    healthy = None
+    _warm_up_thread = None
+
+    def predict(self, image_data):
+        """
+        识别一张图片。
+        :param image_data: 图片字节数据。
+        :return: OcrResult 识别结果。
+        """
+        return self.predict_batch([image_data])[0]
+
+    def predict_batch(self, image_list):
+        """
+        识别多张图片，返回与输入顺序一致的 OcrResult 列表，失败时抛出 OcrError。
+        """
+        raise NotImplementedError
+
+    def health_check(self):
+        """ 检查后端是否可用并做必要的预热 """
+        self.healthy = True
+        return True
+
+    def start_warm_up(self):
+        """
+        在后台线程中执行 health_check，使第一次识别不必等待连接或模型加载。
+        """
+        if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+            self._warm_up_thread = threading.Thread(target=self.health_check, daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def close(self):
+        pass
+
+
+_backends = {}
+
+# 内置后端所在的模块，第一次使用时才导入，使 onnxruntime 等可选依赖不是必需的
+_BUILTIN_BACKENDS = {
+    'paddle_serving': '.paddle_ocr',
+    'onnx': '.onnx_ocr',
+}
+
+
+def register_backend(name):
+    """
+    注册 OCR 后端的类装饰器。
+
+        @register_backend('my_backend')
+        class MyBackend(OcrBackend):
+            ...
+    """
+    def decorator(cls):
+        _backends[name] = cls
+        return cls
+    return decorator
+
+
+def available_backends():
+    """ 返回所有可用的后端名称 """
+    return sorted(set(_backends) | set(_BUILTIN_BACKENDS))
+
+
+def create_backend(name, **kwargs):
+    """
+    按名称创建 OCR 后端，其余参数传给后端的构造函数。
+    """
+    if name not in _backends and name in _BUILTIN_BACKENDS:
+        importlib.import_module(_BUILTIN_BACKENDS[name], __package__)
+    if name not in _backends:
+        raise ValueError("unknown OCR backend: {}".format(name))
+    return _backends[name](**kwargs)
+
+
+@register_backend('fake')
+class FakeOcrBackend(OcrBackend):
+    """
+    用于测试的后端，不做真正的识别。
+    :param results: 每张图片返回的结果，可以是 {'text', 'confidence', 'text_region'} 列表，
+                    也可以是以图片数据为参数、返回这种列表的函数。默认每张图片返回一行，文字为数据的摘要。
+    :param latency: 每次调用的模拟耗时(秒)。
+    :param error: 不为 None 时每次调用都抛出 OcrError(error)。
+    """
+
+    cache_namespace = 'fake'
+
+    def __init__(self, results=None, latency=0.0, error=None):
+        self.results = results
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.images = 0
+        self._lock = threading.Lock()
+
+    def _result(self, image_data):
+        if callable(self.results):
+            return OcrResult.from_items(self.results(image_data))
+        if self.results is not None:
+            return OcrResult.from_items(self.results)
+        text = hashlib.sha1(image_data).hexdigest()[:8]
+        return OcrResult([text], [1.0], [[[0, 0], [100, 0], [100, 20], [0, 20]]])
+
+    def predict_batch(self, image_list):
+        with self._lock:
+            self.calls += 1
+            self.images += len(image_list)
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error is not None:
+            raise OcrError(self.error)
+        return [self._result(image_data) for image_data in image_list]
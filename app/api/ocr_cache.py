@@ -0,0 +1,130 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+
+class OcrCache:
+    """
+    以图片内容哈希为键的磁盘 OCR 结果缓存，超出容量时按最近使用时间淘汰。
+    每条结果单独存为一个文件，写入时先写临时文件再原子替换，
+    读取和淘汰都容忍文件被其他进程删除，因此多个进程可以共用同一个缓存目录。
+    :param cache_dir: 缓存目录。
+    :param max_bytes: 缓存文件总大小上限。
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        # 自上次扫描目录以来写入的字节数，超过容量的 1/16 时再扫描一次，避免每次写入都遍历目录
+        self._written = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(image_data, namespace=''):
+        """
+        计算缓存键。
+        :param image_data: 图片字节数据。
+        :param namespace: 区分不同 OCR 服务、模型版本的命名空间。
+        """
+        digest = hashlib.sha256(namespace.encode('utf8'))
+        digest.update(b'\0')
+        digest.update(image_data)
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.json')
+
+    def get(self, key):
+        """ 读取缓存的识别结果，未命中时返回 None """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf8') as file:
+                result = json.load(file)
+        except (OSError, ValueError):
+            return None
+        # 更新修改时间作为最近使用时间，只读的共享缓存或文件刚被其他进程清理时忽略
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        """ 写入识别结果，写入失败(磁盘已满、目录无权限等)时放弃缓存，不影响识别结果 """
+        path = self._path(key)
+        folder = os.path.dirname(path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=folder)
+        except OSError:
+            return
+
+        try:
+            with os.fdopen(fd, 'w', encoding='utf8') as file:
+                json.dump(result, file, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            # 例如 Windows 上目标文件正被其他进程读取
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            self._written += size
+            need_evict = self._written > self.max_bytes // 16
+            if need_evict:
+                self._written = 0
+        if need_evict:
+            self.evict()
+
+    def evict(self):
+        """ 删除最久未使用的缓存文件，直到总大小降到容量的 90% 以下 """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        entries.sort()
+        target = self.max_bytes * 9 // 10
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+_default_cache = None
+
+
+def get_ocr_cache():
+    """ 获取全局共享的 OcrCache，未设置时返回 None """
+    return _default_cache
+
+
+def set_ocr_cache(cache):
+    """ 设置全局共享的 OcrCache，传入 None 关闭缓存 """
+    global _default_cache
+    _default_cache = cache
+    return cache
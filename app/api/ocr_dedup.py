@@ -0,0 +1,143 @@
+import zlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+from ..common.bk_tree import BKTree
+from ..common.ocr_result import OcrResult
+from ..utils.ocrTools import dhash_with_thumbnail
+
+DEFAULT_MAX_DISTANCE = 16
+DEFAULT_MAX_PIXEL_DIFF = 16
+DEFAULT_MAX_BYTES = 128 * 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ('namespace', 'size', 'thumbnail', 'result')
+
+    def __init__(self, namespace, size, thumbnail, result):
+        self.namespace = namespace
+        self.size = size
+        self.thumbnail = thumbnail
+        self.result = result
+
+
+class PerceptualIndex:
+    """
+    按感知哈希(dHash)索引已识别图片的结果，识别前先查找重复的图片，
+    重新保存、重新压缩过的同尺寸副本直接复用之前的结果。
+    哈希值存在 BK 树中，按汉明距离查找候选；重新压缩通常只改变哈希的几位，
+    而只改动一行文字时哈希往往完全不变，因此哈希只用来找候选，是否复用由像素比较决定：
+    候选的尺寸必须相同，并且 512x512 灰度缩略图中任一像素的差都不超过 max_pixel_diff。
+    缩放过的副本重新采样带来的差异与改动几个字符相当，无法可靠区分，不复用。
+
+    复用的结果来自另一张图片，只改了几个字符的截图仍可能被当作重复，
+    不要用于打码等必须逐字准确的识别。
+    索引按最近使用的顺序淘汰，压缩后的缩略图总大小不超过 max_bytes，照片每张约 200KB，截图通常小得多。
+    :param max_distance: 查找候选的最大汉明距离(共 hash_size * hash_size 位)，放宽后更多重新压缩的副本
+                         能进入像素比较，但不会放宽像素比较本身。
+    :param hash_size: dHash 的边长。
+    :param max_pixel_diff: 缩略图像素灰度差的上限。
+    :param max_bytes: 缩略图总大小的上限(字节)。
+    """
+
+    def __init__(self, max_distance=DEFAULT_MAX_DISTANCE, hash_size=16, max_pixel_diff=DEFAULT_MAX_PIXEL_DIFF,
+                 max_bytes=DEFAULT_MAX_BYTES):
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self.max_pixel_diff = max_pixel_diff
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        # 不同后端、模型的结果分开索引
+        self._trees = {}
+        # 按最近使用排序的有效条目，被淘汰的条目仍留在 BK 树中，数量过多时重建
+        self._entries = OrderedDict()
+        self._evicted = 0
+        self._lock = threading.Lock()
+
+    def signature(self, image_data):
+        """
+        计算图片的 (哈希值, (宽, 高), 压缩后的灰度缩略图)，只解码一次，图片无法解码时返回 None。
+        """
+        try:
+            image_hash, size, thumbnail = dhash_with_thumbnail(image_data, self.hash_size)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            return None
+        return image_hash, size, zlib.compress(thumbnail.tobytes())
+
+    def _same_pixels(self, thumbnail, old_thumbnail):
+        if thumbnail == old_thumbnail:
+            return True
+        new = np.frombuffer(zlib.decompress(thumbnail), dtype=np.uint8).astype(np.int16)
+        old = np.frombuffer(zlib.decompress(old_thumbnail), dtype=np.uint8).astype(np.int16)
+        return int(np.abs(new - old).max()) <= self.max_pixel_diff
+
+    def lookup(self, signature, namespace=''):
+        """
+        查找重复的图片。
+        :param signature: signature 的返回值。
+        :param namespace: 区分不同 OCR 后端、模型的命名空间。
+        :return: 复用的 OcrResult，没有重复时返回 None。
+        """
+        image_hash, size, thumbnail = signature
+        with self._lock:
+            tree = self._trees.get(namespace)
+            candidates = tree.search(image_hash, self.max_distance) if tree is not None else []
+            # 在锁内取出缩略图和结果，比较期间条目被淘汰也不受影响
+            candidates = [(entry, entry.thumbnail, entry.result) for _, _, entry in candidates
+                          if entry in self._entries and entry.size == size]
+        for entry, old_thumbnail, result in candidates:
+            if self._same_pixels(thumbnail, old_thumbnail):
+                with self._lock:
+                    self.hits += 1
+                    if entry in self._entries:
+                        self._entries.move_to_end(entry)
+                return result
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def add(self, signature, result, namespace=''):
+        """ 记录一张图片的识别结果，超过 max_bytes 时淘汰最久未使用的条目 """
+        image_hash, size, thumbnail = signature
+        entry = _Entry(namespace, size, thumbnail, OcrResult.from_items(result))
+        with self._lock:
+            self._trees.setdefault(namespace, BKTree()).insert(image_hash, entry)
+            self._entries[entry] = image_hash
+            self.bytes += len(thumbnail)
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                old, _ = self._entries.popitem(last=False)
+                self.bytes -= len(old.thumbnail)
+                # BK 树中的节点重建前仍引用该条目，先释放占内存的部分
+                old.thumbnail = old.result = None
+                self._evicted += 1
+            if self._evicted > len(self._entries):
+                self._rebuild()
+
+    def _rebuild(self):
+        """ 用有效条目重建 BK 树，去掉已淘汰的节点 """
+        trees = {}
+        for entry, image_hash in self._entries.items():
+            trees.setdefault(entry.namespace, BKTree()).insert(image_hash, entry)
+        self._trees = trees
+        self._evicted = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_default_index = None
+
+
+def get_perceptual_index():
+    """ 获取全局共享的 PerceptualIndex，未设置时返回 None """
+    return _default_index
+
+
+def set_perceptual_index(index):
+    """ 设置全局共享的 PerceptualIndex，传入 None 关闭近似重复检测 """
+    global _default_index
+    _default_index = index
+    return index
@@ -0,0 +1,153 @@
+import time
+import threading
+from collections import deque
+import requests
+
+
+def http_probe(url, timeout=3.0):
+    """ 默认的探测方式：能收到任何 HTTP 响应即认为节点可用 """
+    try:
+        requests.get(url, timeout=timeout).close()
+    except requests.RequestException:
+        return False
+    return True
+
+
+class LatencyWindow:
+    """
+    最近若干次请求耗时的滑动窗口，用于估计分位数。
+    :param size: 保留的样本数。
+    """
+
+    def __init__(self, size=256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._samples)
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        """ 返回第 q 百分位的耗时，没有样本时返回 None """
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * q / 100))]
+
+
+class Endpoint:
+    """ 一个 OCR 服务节点及其状态 """
+
+    def __init__(self, url):
+        self.url = url
+        # 在途请求数
+        self.outstanding = 0
+        # 连续失败次数
+        self.failures = 0
+        self.healthy = True
+        # 被摘除后下一次探测的时间
+        self.retry_at = 0.0
+
+
+class EndpointPool:
+    """
+    多个 OCR 服务节点的负载均衡，每次选择在途请求最少的可用节点。
+    连续失败达到 max_failures 次的节点会被摘除，之后由后台线程每隔 eject_seconds 探测一次，
+    探测成功后重新加入。所有节点都被摘除时仍会选择最早可以重试的节点，而不是直接失败。
+    :param urls: 节点地址列表。
+    :param max_failures: 摘除节点前允许的连续失败次数。
+    :param eject_seconds: 摘除后的探测间隔(秒)。
+    :param probe: 探测函数，参数为节点地址，返回节点是否可用。
+    """
+
+    def __init__(self, urls, max_failures=3, eject_seconds=10.0, probe=http_probe):
+        if not urls:
+            raise ValueError("at least one OCR endpoint is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.probe = probe
+
+        self._lock = threading.Lock()
+        self._next = 0
+        self._probe_thread = None
+
+    @property
+    def urls(self):
+        return [endpoint.url for endpoint in self.endpoints]
+
+    def acquire(self, exclude=None):
+        """
+        选择一个节点并把它的在途请求数加一，用完后必须调用 release。
+        :param exclude: 尽量避开的节点。
+        """
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.healthy and e is not exclude]
+            if not candidates:
+                candidates = [e for e in self.endpoints if e.healthy]
+            if not candidates:
+                candidates = [min(self.endpoints, key=lambda e: e.retry_at)]
+
+            # 在途请求数相同时轮流选择，避免总是压在第一个节点上
+            self._next += 1
+            start = self._next % len(candidates)
+            endpoint = min(candidates[start:] + candidates[:start], key=lambda e: e.outstanding)
+            endpoint.outstanding += 1
+            return endpoint
+
+    def release(self, endpoint, ok):
+        """
+        请求结束后调用。
+        :param ok: 请求是否成功，网络错误和 err_no != 0 都算失败。
+        """
+        with self._lock:
+            endpoint.outstanding -= 1
+            self._record(endpoint, ok)
+
+    def mark(self, endpoint, ok):
+        """ 记录一次不经过 acquire 的检查结果，如启动时的健康检查 """
+        with self._lock:
+            self._record(endpoint, ok, self.max_failures)
+
+    def _record(self, endpoint, ok, weight=1):
+        if ok:
+            endpoint.failures = 0
+            endpoint.healthy = True
+            return
+
+        endpoint.failures += weight
+        if endpoint.healthy and endpoint.failures >= self.max_failures:
+            endpoint.healthy = False
+            endpoint.retry_at = time.monotonic() + self.eject_seconds
+            self._start_probe()
+
+    def _start_probe(self):
+        if self._probe_thread is None or not self._probe_thread.is_alive():
+            self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+            self._probe_thread.start()
+
+    def _probe_loop(self):
+        while True:
+            with self._lock:
+                ejected = [e for e in self.endpoints if not e.healthy]
+                if not ejected:
+                    self._probe_thread = None
+                    return
+                endpoint = min(ejected, key=lambda e: e.retry_at)
+                delay = endpoint.retry_at - time.monotonic()
+
+            if delay > 0:
+                time.sleep(delay)
+                continue
+
+            ok = self.probe(endpoint.url)
+            with self._lock:
+                if ok:
+                    endpoint.failures = 0
+                    endpoint.healthy = True
+                else:
+                    endpoint.retry_at = time.monotonic() + self.eject_seconds
@@ -0,0 +1,132 @@
+import time
+import threading
+import requests
+from .ocr_backend import OcrError
+
+# 视为服务端过载的异常，图片本身的问题(ValueError 等)不影响并发上限
+CONGESTION_ERRORS = (OcrError, requests.RequestException)
+
+
+class _Slot:
+    __slots__ = ('limiter', 'cost', 'start')
+
+    def __init__(self, limiter, cost):
+        self.limiter = limiter
+        self.cost = cost
+
+    def __enter__(self):
+        self.limiter.acquire()
+        self.start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.limiter.release((time.monotonic() - self.start) / max(self.cost, 1), True)
+        elif issubclass(exc_type, CONGESTION_ERRORS):
+            self.limiter.release(None, False)
+        else:
+            self.limiter.release()
+
+
+class AdaptiveLimiter:
+    """
+    按 AIMD(加性增、乘性减)自动调整同时在途的 OCR 请求数。
+    延迟接近基线时每经过约一个上限数量的请求把上限加 1；平滑后的延迟超过基线的 tolerance 倍，
+    或服务端返回 err_no != 0、网络出错时把上限乘以 backoff。每次减小后至少等一轮在途请求完成才会再次减小。
+    延迟按请求中的图片数归一化，批量大小不同的请求可以互相比较。
+    基线取观察到的最小延迟，每 window 个样本向这段时间的最小值缓慢靠拢，服务端变慢后基线也会跟着调整。
+    :param initial: 初始上限。
+    :param min_limit: 上限的最小值。
+    :param max_limit: 上限的最大值，不宜超过客户端的连接池大小和调用方的线程数。
+    :param tolerance: 延迟超过基线多少倍时视为拥塞。
+    :param backoff: 拥塞时上限乘以的系数。
+    :param window: 更新基线的样本间隔。
+    """
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64, tolerance=2.0, backoff=0.7, window=100,
+                 smoothing=0.2):
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window = window
+        self.smoothing = smoothing
+        self.in_flight = 0
+
+        self.baseline = None
+        self.latency = None
+        self._window_min = None
+        self._window_count = 0
+        # 距离上次减小还需完成的请求数
+        self._cooldown = 0
+        self._condition = threading.Condition()
+
+    def slot(self, cost=1):
+        """
+        占用一个名额的上下文管理器，退出时按耗时和异常类型调整上限。
+        :param cost: 请求中的图片数，用于归一化延迟。
+        """
+        return _Slot(self, cost)
+
+    def acquire(self):
+        """ 等到在途请求数低于上限后占用一个名额 """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency=None, ok=None):
+        """
+        归还名额。
+        :param latency: 按图片数归一化的请求耗时(秒)。
+        :param ok: True 表示成功，False 表示服务端过载或网络出错，None 表示不参与调整。
+        """
+        with self._condition:
+            saturated = self.in_flight >= int(self.limit)
+            self.in_flight -= 1
+            if self._cooldown:
+                self._cooldown -= 1
+            if ok is False:
+                self._decrease()
+            elif ok:
+                self._observe(latency)
+                if self.latency > self.baseline * self.tolerance:
+                    self._decrease()
+                elif saturated:
+                    # 只有用满上限时才增加，调用方本身并发不足时上限不会无限增长
+                    self.limit = min(self.limit + 1 / self.limit, self.max_limit)
+            self._condition.notify_all()
+
+    def _observe(self, latency):
+        if self.baseline is None:
+            self.baseline = self.latency = self._window_min = latency
+        self.latency += (latency - self.latency) * self.smoothing
+        self.baseline = min(self.baseline, latency)
+        self._window_min = min(self._window_min, latency)
+        self._window_count += 1
+        if self._window_count >= self.window:
+            self.baseline += (self._window_min - self.baseline) * 0.25
+            self._window_min = latency
+            self._window_count = 0
+
+    def _decrease(self):
+        if self._cooldown:
+            return
+        self.limit = max(self.limit * self.backoff, self.min_limit)
+        self._cooldown = self.in_flight + 1
+
+
+_default_limiter = None
+
+
+def get_ocr_limiter():
+    """ 获取全局共享的 AdaptiveLimiter，未设置时返回 None """
+    return _default_limiter
+
+
+def set_ocr_limiter(limiter):
+    """ 设置全局共享的 AdaptiveLimiter，传入 None 关闭批量识别的自适应并发 """
+    global _default_limiter
+    _default_limiter = limiter
+    return limiter
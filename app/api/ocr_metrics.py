@@ -0,0 +1,163 @@
+import json
+import math
+import time
+import threading
+from contextlib import nullcontext
+
+# 每个 2 的幂次区间再等分为几个桶，相邻桶的边界相差约 9%
+BUCKETS_PER_OCTAVE = 8
+
+# paddle_ocr 中各阶段的名称，耗时单位为秒
+STAGES = ('read', 'preprocess', 'encode', 'network', 'json', 'decode', 'format')
+
+
+class Histogram:
+    """
+    按对数分桶的直方图，不区分单位，耗时、字节数、文本框数都可以使用。
+    只保存各桶的计数，内存占用与样本数无关，分位数的相对误差不超过一个桶宽。
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        # 桶序号 -> 计数，值为 0 时记在 None 桶中
+        self.buckets = {}
+
+    def add(self, value):
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        index = math.floor(math.log2(value) * BUCKETS_PER_OCTAVE) if value > 0 else None
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    @staticmethod
+    def _upper_bound(index):
+        return 0.0 if index is None else 2 ** ((index + 1) / BUCKETS_PER_OCTAVE)
+
+    def percentile(self, q):
+        """ 估计第 q 百分位数，取所在桶的上界并限制在 [min, max] 内 """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for index in sorted(self.buckets, key=lambda i: -math.inf if i is None else i):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(max(self._upper_bound(index), self.min), self.max)
+        return self.max
+
+    def to_dict(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count,
+            'min': self.min,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'max': self.max,
+            'buckets': [[self._upper_bound(index), self.buckets[index]]
+                        for index in sorted(self.buckets, key=lambda i: -math.inf if i is None else i)],
+        }
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class OcrMetrics:
+    """
+    OCR 各阶段的耗时、请求/响应大小和文本框数量的统计，每个指标一个 Histogram。
+
+    - 耗时(秒): read 映射文件、preprocess 缩小图片、encode base64 编码、network 发送请求并接收响应
+      (不含编码)、json 解析响应、decode 解析识别结果字符串、format 构造 OcrResult。
+      文件是按需映射的，read 只包含建立映射，实际的磁盘读取发生在 encode 中
+    - request_bytes / response_bytes: 每个请求的请求体和响应体大小
+    - images: 每个请求的图片数，boxes: 每张图片的文本框数
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.add(value)
+
+    def timer(self, name):
+        """ 记录 with 语句块耗时的上下文管理器 """
+        return _Timer(self, name)
+
+    def histogram(self, name):
+        """ 返回指标的 Histogram 副本，没有样本时返回 None """
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                return None
+            copy = Histogram()
+            copy.__dict__.update(histogram.__dict__, buckets=dict(histogram.buckets))
+            return copy
+
+    def snapshot(self):
+        """ 所有指标的 {名称: 统计} 字典 """
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def to_json(self, indent=2):
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def dump(self, path):
+        """ 把当前统计写入 JSON 文件 """
+        with open(path, 'w', encoding='utf8') as file:
+            file.write(self.to_json())
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+_default_metrics = OcrMetrics()
+
+
+def get_ocr_metrics():
+    """ 获取全局的 OcrMetrics，关闭统计时返回 None """
+    return _default_metrics
+
+
+def set_ocr_metrics(metrics):
+    """ 替换全局的 OcrMetrics，传入 None 关闭统计 """
+    global _default_metrics
+    _default_metrics = metrics
+    return metrics
+
+
+def observe(name, value):
+    """ 向全局的 OcrMetrics 记录一个样本 """
+    metrics = _default_metrics
+    if metrics is not None:
+        metrics.observe(name, value)
+
+
+def timed(name):
+    """ 向全局的 OcrMetrics 记录 with 语句块耗时，关闭统计时不做任何事 """
+    metrics = _default_metrics
+    return metrics.timer(name) if metrics is not None else nullcontext()
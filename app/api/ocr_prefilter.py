@@ -0,0 +1,57 @@
+import threading
+from PIL import Image
+from ..utils.ocrTools import text_block_count
+
+DEFAULT_MIN_BLOCKS = 3
+
+
+class TextPrefilter:
+    """
+    识别前在本地粗略判断图片中有没有文字，明显没有文字的图片不发送给 OCR 服务。
+    判断方式见 text_block_count。无法解码的图片不跳过，交给 OCR 服务报错。
+    只在调用方通过 prefilter 参数显式传入时生效，iter_ocr / perform_ocr 默认不跳过任何图片，
+    文件夹批量识别(folder_ocr)默认使用全局共享的过滤器。
+    :param min_blocks: 像文字的块少于该数量时跳过，越大跳过的越多，也越可能漏掉很小的文字。
+    """
+
+    def __init__(self, min_blocks=DEFAULT_MIN_BLOCKS):
+        self.min_blocks = min_blocks
+        self.checked = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def should_skip(self, image_data):
+        """ 图片明显没有文字时返回 True """
+        try:
+            skip = text_block_count(image_data) < self.min_blocks
+        except (OSError, ValueError, Image.DecompressionBombError):
+            skip = False
+        with self._lock:
+            self.checked += 1
+            self.skipped += skip
+        return skip
+
+    def report(self):
+        """ 返回 {'checked', 'skipped', 'skip_rate'} 统计 """
+        with self._lock:
+            checked, skipped = self.checked, self.skipped
+        return {'checked': checked, 'skipped': skipped, 'skip_rate': skipped / checked if checked else 0.0}
+
+    def reset(self):
+        with self._lock:
+            self.checked = self.skipped = 0
+
+
+_default_prefilter = None
+
+
+def get_text_prefilter():
+    """ 获取全局共享的 TextPrefilter，未设置时返回 None。folder_ocr 默认使用，其他识别函数需要显式传入 """
+    return _default_prefilter
+
+
+def set_text_prefilter(prefilter):
+    """ 设置全局共享的 TextPrefilter，传入 None 时所有图片都发送识别 """
+    global _default_prefilter
+    _default_prefilter = prefilter
+    return prefilter
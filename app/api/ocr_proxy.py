@@ -0,0 +1,264 @@
+"""
+本机的 OCR 合并代理，对外提供与 Paddle Serving 相同的 /ocr/prediction 接口。
+在很短的时间窗口内到达的单图请求被合并成一个多图请求转发给服务端，再把结果分发回各个调用方，
+GUI、命令行、监控脚本等只需把地址指向代理即可获得服务端批处理的吞吐量。
+图片的 base64 和识别结果字符串都原样转发，代理不解码图片也不解析结果。
+官方的 pdserving 服务每个请求只识别一张图片，此时代理逐张转发，合并只对支持多图请求的服务端有效。
+
+    python -m app.api.ocr_proxy --port 9999 --upstream http://127.0.0.1:9998/ocr/prediction --window-ms 5 --max-batch 16
+"""
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import requests
+from requests.adapters import HTTPAdapter
+from .ocr_backend import OcrError
+from .ocr_endpoints import EndpointPool
+from .paddle_ocr import DEFAULT_OCR_URL, _request_keys
+
+DEFAULT_PROXY_PORT = 9999
+
+
+def _response_keys(count):
+    """ 与官方服务一致，单张图片的结果使用 "result" 键 """
+    if count == 1:
+        return ["result"]
+    return ["result_{}".format(i) for i in range(count)]
+
+
+class RequestCoalescer:
+    """
+    把并发提交的单张图片收集成批：第一张图片到达后最多再等 window 秒，或凑满 max_batch 张就发出。
+    一批正在转发时继续收集下一批，同时转发的批次数不超过 max_in_flight，
+    转发能力用满时新到的图片留在队列中，合并成更大的批次。
+    :param forward: 转发函数，参数为 base64 字符串列表，返回与之对应的结果字符串列表，失败时抛出异常。
+    :param max_batch: 每批最多的图片数。
+    :param window: 收集一批的最长等待时间(秒)。
+    :param max_in_flight: 同时转发的批次数。
+    """
+
+    def __init__(self, forward, max_batch=16, window=0.005, max_in_flight=4):
+        self.forward = forward
+        self.max_batch = max(max_batch, 1)
+        self.window = window
+        self._items = []
+        self._closed = False
+        self._condition = threading.Condition()
+        self._in_flight = threading.Semaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, image_base64):
+        """ 提交一张图片，返回结果字符串的 Future """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("coalescer is closed")
+            self._items.append((image_base64, future))
+            self._condition.notify()
+        return future
+
+    def _take_batch(self):
+        with self._condition:
+            while not self._items:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            expires = time.monotonic() + self.window
+            while len(self._items) < self.max_batch and not self._closed:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch, self._items = self._items[:self.max_batch], self._items[self.max_batch:]
+            return batch
+
+    def _run(self):
+        while True:
+            self._in_flight.acquire()
+            batch = self._take_batch()
+            if batch is None:
+                self._in_flight.release()
+                return
+            self._executor.submit(self._forward_batch, batch)
+
+    def _forward_batch(self, batch):
+        try:
+            self._deliver(batch)
+        except Exception as e:
+            # 意外的异常在线程池中会被吞掉，必须交给每个还在等待的调用方，否则它们要一直等到超时
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.release()
+
+    def _deliver(self, batch):
+        try:
+            results = self.forward([image for image, _ in batch])
+        except (OcrError, requests.RequestException, ValueError) as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # 一张无法识别的图片会使整批失败，逐张重发，只让出错的调用方收到错误
+            for item in batch:
+                self._deliver([item])
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        self._executor.shutdown()
+
+
+class UpstreamForwarder:
+    """
+    把一批 base64 图片作为一个多图请求发给 Paddle Serving，返回原始的结果字符串列表。
+    官方的 pdserving 服务每个请求只识别一张图片，第一次多图请求失败而逐张重发成功时，
+    之后的批次都拆成单图请求并发转发，此时代理只起到限制并发的作用。
+    :param url: 服务地址或多个副本的地址列表。
+    """
+
+    def __init__(self, url=DEFAULT_OCR_URL, pool_size=8, connect_timeout=3.0, read_timeout=60.0):
+        urls = [url] if isinstance(url, str) else list(url)
+        self.endpoints = EndpointPool(urls)
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(urls), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # 服务端是否支持多图请求，None 表示还不知道
+        self.batch_supported = None
+        self._executor = ThreadPoolExecutor(max_workers=pool_size)
+
+    def __call__(self, images):
+        if len(images) == 1 or self.batch_supported:
+            return self._post(images)
+        if self.batch_supported is None:
+            try:
+                results = self._post(images)
+                self.batch_supported = True
+                return results
+            except OcrError:
+                pass
+        results = list(self._executor.map(lambda image: self._post([image])[0], images))
+        self.batch_supported = False
+        return results
+
+    def _post(self, images):
+        body = json.dumps({"key": _request_keys(len(images)), "value": images})
+        endpoint = self.endpoints.acquire()
+        ok = False
+        try:
+            result = self.session.post(url=endpoint.url, data=body, timeout=self.timeout).json()
+            try:
+                err_no, values = result["err_no"], result["value"]
+            except (KeyError, TypeError):
+                raise OcrError("malformed response from OCR server")
+            # 与 OcrClient 相同，服务端返回 err_no != 0 也计为该节点的一次失败
+            if err_no != 0:
+                raise OcrError(result.get("err_msg") or "OCR server error {}".format(err_no))
+            if not isinstance(values, list) or len(values) != len(images):
+                raise OcrError("expected {} results, got {}".format(
+                    len(images), len(values) if isinstance(values, list) else type(values).__name__))
+            ok = True
+        finally:
+            self.endpoints.release(endpoint, ok)
+        return values
+
+    def close(self):
+        self._executor.shutdown()
+        self.session.close()
+
+
+class OcrProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    coalescer = None
+    timeout_seconds = 60.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        # 客户端的健康检查只要求能收到响应
+        self._send_json(405, {"err_no": 1, "err_msg": "Method Not Allowed"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            values = request["value"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"err_no": 1, "err_msg": "malformed request"})
+            return
+
+        # 多图请求拆成单张图片参与合并，结果按原顺序拼回
+        futures = [self.coalescer.submit(value) for value in values]
+        try:
+            results = [future.result(self.timeout_seconds) for future in futures]
+        except Exception as e:
+            # 包括等待超时和转发时的意外异常，都以 err_no != 0 回复而不是断开连接
+            self._send_json(200, {"err_no": 1, "err_msg": str(e) or type(e).__name__, "key": [], "value": []})
+            return
+        self._send_json(200, {"err_no": 0, "err_msg": "", "key": _response_keys(len(results)), "value": results})
+
+
+def make_proxy(upstream=DEFAULT_OCR_URL, host='127.0.0.1', port=DEFAULT_PROXY_PORT, max_batch=16, window=0.005,
+               max_in_flight=4, read_timeout=60.0):
+    """
+    创建合并代理，port 为 0 时自动选择空闲端口。关闭时调用 server.server_close() 和 server.coalescer.close()。
+    :param upstream: Paddle Serving 地址或多个副本的地址列表。
+    """
+    forwarder = UpstreamForwarder(upstream, pool_size=max_in_flight, read_timeout=read_timeout)
+    coalescer = RequestCoalescer(forwarder, max_batch, window, max_in_flight)
+    handler = type('Handler', (OcrProxyHandler,), {'coalescer': coalescer, 'timeout_seconds': read_timeout})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.coalescer = coalescer
+    server.forwarder = forwarder
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PROXY_PORT)
+    parser.add_argument('--upstream', action='append', help="Paddle Serving 地址，可重复指定多个副本")
+    parser.add_argument('--max-batch', type=int, default=16, help="每个转发请求最多的图片数")
+    parser.add_argument('--window-ms', type=float, default=5.0, help="收集一批的最长等待时间(毫秒)")
+    parser.add_argument('--max-in-flight', type=int, default=4, help="同时转发的请求数")
+    parser.add_argument('--read-timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    server = make_proxy(args.upstream or DEFAULT_OCR_URL, args.host, args.port, args.max_batch,
+                        args.window_ms / 1000, args.max_in_flight, args.read_timeout)
+    print("OCR proxy listening on http://{}:{}/ocr/prediction".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.coalescer.close()
+        server.forwarder.close()
+
+
+if __name__ == '__main__':
+    main()
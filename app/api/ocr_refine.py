@@ -0,0 +1,85 @@
+import io
+import numpy as np
+import requests
+from PIL import Image, ImageOps
+from .paddle_ocr import OcrError, get_ocr_client, _map_file, _ocr_record
+from ..common.ocr_result import OcrResult
+
+DEFAULT_THRESHOLD = 0.9
+
+
+def _open_image(image_data):
+    """ 打开图片并按 EXIF 方向摆正，与服务端解码时看到的方向一致 """
+    img = ImageOps.exif_transpose(Image.open(io.BytesIO(image_data)))
+    return img.convert('RGB') if img.mode not in ('RGB', 'L') else img
+
+
+def _encode_crop(img, rect, upscale, padding):
+    """ 裁出文本框外接矩形(向外扩 padding 像素)并放大 upscale 倍，编码为 PNG 以免压缩损失细节 """
+    left, top, right, bottom = rect
+    box = (max(left - padding, 0), max(top - padding, 0),
+           min(right + padding, img.width), min(bottom + padding, img.height))
+    crop = img.crop(box)
+    size = (max(1, round(crop.width * upscale)), max(1, round(crop.height * upscale)))
+    buffer = io.BytesIO()
+    crop.resize(size, Image.LANCZOS).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+def _main_line(result):
+    """ 裁剪区域中可能带进相邻行的一部分，取面积最大的一行作为该区域的识别结果 """
+    if not len(result):
+        return None
+    rects = result.rects()
+    areas = (rects[:, 2] - rects[:, 0]) * (rects[:, 3] - rects[:, 1])
+    return int(np.argmax(areas))
+
+
+def refine_ocr_result(image_data, ocr_result, client=None, threshold=DEFAULT_THRESHOLD, upscale=2.0, padding=4):
+    """
+    只对置信度低于 threshold 的行做第二遍识别：裁出这些行并放大，在一个请求中发送，
+    新的置信度更高时替换原来的文字和置信度，文本框保持第一遍的结果。
+    第二遍失败时原样返回第一遍的结果。
+    :param image_data: 图片字节数据。
+    :param ocr_result: 第一遍的识别结果。
+    :param client: 使用的 OCR 后端(OcrBackend)，默认为全局共享的后端。
+    :param threshold: 低于该置信度的行才重新识别。
+    :param upscale: 裁剪区域的放大倍数。
+    :param padding: 裁剪时向外扩展的像素数。
+    :return: 新的 OcrResult，没有需要重新识别的行时返回原结果。
+    """
+    ocr_result = OcrResult.from_items(ocr_result)
+    indices = np.flatnonzero(ocr_result.confidences < threshold)
+    if not len(indices):
+        return ocr_result
+
+    client = client or get_ocr_client()
+    try:
+        img = _open_image(image_data)
+        rects = ocr_result.rects()
+        crops = [_encode_crop(img, rects[i], upscale, padding) for i in indices]
+        results = client.predict_batch(crops)
+    except (OcrError, requests.RequestException, OSError, ValueError, Image.DecompressionBombError):
+        return ocr_result
+
+    texts = list(ocr_result.texts)
+    confidences = ocr_result.confidences.copy()
+    for i, result in zip(indices, results):
+        line = _main_line(result)
+        if line is not None and result.confidences[line] > confidences[i]:
+            texts[i] = result.texts[line]
+            confidences[i] = result.confidences[line]
+    return OcrResult(texts, confidences, ocr_result.boxes)
+
+
+def ocr_refined_file(img_file, client=None, threshold=DEFAULT_THRESHOLD, **kwargs):
+    """
+    识别一个文件并对低置信度的行做第二遍识别，返回与 perform_ocr 相同格式的结果记录，其余参数同 refine_ocr_result。
+    """
+    client = client or get_ocr_client()
+    try:
+        image_data = _map_file(img_file)
+        result = client.predict(image_data)
+    except (OcrError, requests.RequestException, OSError, ValueError) as e:
+        return _ocr_record(img_file, error=e)
+    return _ocr_record(img_file, refine_ocr_result(image_data, result, client, threshold, **kwargs))
@@ -0,0 +1,139 @@
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+
+DEFAULT_WEIGHTS = {INTERACTIVE: 16, BATCH: 1}
+
+
+class _Job:
+    __slots__ = ('future', 'fn', 'args', 'finish')
+
+    def __init__(self, future, fn, args, finish):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.finish = finish
+
+
+class OcrScheduler:
+    """
+    全局共享的 OCR 任务调度器，按优先级类别做加权公平排队(self-clocked fair queuing)。
+    每个任务的虚拟完成时间为 max(当前虚拟时间, 同类上一个任务的完成时间) + cost / 权重，
+    空闲的工作线程总是取虚拟完成时间最小的任务，因此新到的交互任务会排在已经积压的批量任务之前。
+    另外保留 reserved 个工作线程只给非批量任务使用，交互任务不必等正在执行的批量任务结束，
+    其延迟与后台队列的长度无关。
+    :param workers: 工作线程数，不宜超过 OCR 客户端的连接池大小。
+    :param weights: {类别: 权重}，未列出的类别权重为 1。
+    :param reserved: 批量任务不能占用的工作线程数。
+    """
+
+    def __init__(self, workers=8, weights=None, reserved=1):
+        self.workers = max(workers, 1)
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.reserved = min(reserved, self.workers - 1)
+
+        self._queues = {}
+        self._last_finish = {}
+        self._virtual_time = 0.0
+        self._running_batch = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, fn, *args, priority=BATCH, cost=1.0):
+        """
+        提交一个任务。
+        :param fn: 在工作线程中执行的函数，args 为其参数。
+        :param priority: 优先级类别，INTERACTIVE 或 BATCH，也可以是 weights 中的其他类别。
+        :param cost: 任务的开销，如图片数量，用于按权重分配处理能力。
+        :return: concurrent.futures.Future，任务开始执行前取消则不再执行。
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("cannot submit to a closed OcrScheduler")
+            start = max(self._virtual_time, self._last_finish.get(priority, 0.0))
+            finish = start + cost / self.weights.get(priority, 1)
+            self._last_finish[priority] = finish
+            self._queues.setdefault(priority, deque()).append(_Job(future, fn, args, finish))
+            self._condition.notify()
+        return future
+
+    def pending(self, priority=None):
+        """ 排队中(尚未开始)的任务数 """
+        with self._condition:
+            if priority is not None:
+                return len(self._queues.get(priority, ()))
+            return sum(len(queue) for queue in self._queues.values())
+
+    def _next_job(self):
+        """ 取出可以执行的、虚拟完成时间最小的任务，没有时返回 None。调用时需持有锁 """
+        batch_full = self._running_batch >= self.workers - self.reserved
+        best = None
+        for priority, queue in self._queues.items():
+            if queue and not (priority == BATCH and batch_full):
+                if best is None or queue[0].finish < self._queues[best][0].finish:
+                    best = priority
+        if best is None:
+            return None, None
+        job = self._queues[best].popleft()
+        self._virtual_time = max(self._virtual_time, job.finish)
+        return best, job
+
+    def _run(self):
+        while True:
+            with self._condition:
+                priority, job = self._next_job()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._condition.wait()
+                    priority, job = self._next_job()
+                if priority == BATCH:
+                    self._running_batch += 1
+
+            try:
+                if job.future.set_running_or_notify_cancel():
+                    try:
+                        job.future.set_result(job.fn(*job.args))
+                    except BaseException as e:
+                        job.future.set_exception(e)
+            finally:
+                if priority == BATCH:
+                    with self._condition:
+                        self._running_batch -= 1
+                        # 批量任务的名额空出，唤醒等待中的线程
+                        self._condition.notify()
+
+    def close(self, cancel_pending=True):
+        """ 停止接受新任务，排队中的任务默认取消，工作线程在执行完手头的任务后退出 """
+        with self._condition:
+            self._closed = True
+            if cancel_pending:
+                for queue in self._queues.values():
+                    for job in queue:
+                        job.future.cancel()
+                    queue.clear()
+            self._condition.notify_all()
+
+
+_default_scheduler = None
+
+
+def get_ocr_scheduler():
+    """ 获取全局共享的 OcrScheduler，未设置时返回 None """
+    return _default_scheduler
+
+
+def set_ocr_scheduler(scheduler):
+    """ 设置全局共享的 OcrScheduler，传入 None 时 iter_ocr 各自使用线程池 """
+    global _default_scheduler
+    old_scheduler, _default_scheduler = _default_scheduler, scheduler
+    if old_scheduler is not None and old_scheduler is not scheduler:
+        old_scheduler.close()
+    return scheduler
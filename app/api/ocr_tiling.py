@@ -0,0 +1,204 @@
+import io
+import os
+import zlib
+import base64
+import struct
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from PIL import Image, ImageOps
+from .ocr_cache import get_ocr_cache
+from .paddle_ocr import OcrError, get_ocr_client, _read_file, _ocr_record
+from ..common.ocr_result import OcrResult
+from ..utils.ocrTools import make_tiles, offset_ocr_result, merge_ocr_boxes
+
+DEFAULT_TILE_SIZE = 2048
+DEFAULT_OVERLAP = 256
+# 增量识别比较差异时把图片缩小的倍数，每个像素是原图 2x2 像素的平均值
+DIFF_SCALE = 2
+
+# 切块识别默认允许的最大像素数，与 PIL 直接拒绝打开的上限(MAX_IMAGE_PIXELS 的两倍)相同，
+# 约 1.79 亿像素，MAX_IMAGE_PIXELS 为 None 时不限制。可信的更大图片由调用方通过 max_pixels 放宽
+MAX_TILED_PIXELS = 2 * Image.MAX_IMAGE_PIXELS if Image.MAX_IMAGE_PIXELS else None
+
+
+def _open_unchecked(image_data):
+    """
+    与 Image.open 相同地逐个尝试已注册的格式，但不做 PIL 的像素数检查，像素数由调用方检查。
+    """
+    Image.init()
+    prefix = image_data[:16]
+    for format_id in Image.ID:
+        factory, accept = Image.OPEN[format_id]
+        if accept is not None and accept(prefix) is not True:
+            continue
+        try:
+            return factory(io.BytesIO(image_data), '')
+        except (SyntaxError, IndexError, TypeError, struct.error):
+            continue
+    raise ValueError("cannot identify image")
+
+
+def _open_large_image(image_data, max_pixels=MAX_TILED_PIXELS):
+    """
+    打开图片并按 EXIF 方向摆正。切块识别针对的就是超大图片，不使用 PIL 的像素数上限，
+    改为检查 max_pixels，也不修改 PIL 的全局设置。超过上限时抛出 ValueError，max_pixels 为 None 时不限制。
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            img = Image.open(io.BytesIO(image_data))
+    except Image.DecompressionBombError:
+        img = _open_unchecked(image_data)
+    if max_pixels is not None and img.width * img.height > max_pixels:
+        raise ValueError("image has {} pixels, more than the limit of {}".format(img.width * img.height, max_pixels))
+    img = ImageOps.exif_transpose(img)
+    img = img.convert('RGB') if img.mode not in ('RGB', 'L') else img
+    # 先完整解码，之后各线程并发 crop 时不会重复触发延迟加载
+    img.load()
+    return img
+
+
+def _encode_tile(img, box, quality):
+    buffer = io.BytesIO()
+    img.crop(box).save(buffer, format='JPEG', quality=quality)
+    return buffer.getvalue()
+
+
+def ocr_tiled(image_data, client=None, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP, workers=4,
+              merge_threshold=0.5, quality=95, max_pixels=MAX_TILED_PIXELS):
+    """
+    把大图切成相互重叠的块并行识别，再把各块的文本框平移回整图坐标并合并重叠区域中的重复框。
+    :param image_data: 图片字节数据。
+    :param client: 使用的 OCR 后端(OcrBackend)，默认为全局共享的后端。
+    :param tile_size: 块的边长(像素)。
+    :param overlap: 相邻块重叠的宽度(像素)，应大于一行文字的高度。
+    :param workers: 同时识别的块数。
+    :param merge_threshold: 判定重复框的重叠比例，见 merge_ocr_boxes。
+    :param quality: 块重新编码为 JPEG 的质量。
+    :param max_pixels: 允许的最大像素数，超过时抛出 ValueError，默认为 MAX_TILED_PIXELS(约 1.79 亿像素)。
+                       来源可信的十亿像素级图片可以调大或传入 None，解码需要相应的内存。
+    :return: OcrResult，按从上到下、从左到右排序。
+    """
+    if overlap >= tile_size:
+        raise ValueError("overlap must be smaller than tile_size")
+    client = client or get_ocr_client()
+    img = _open_large_image(image_data, max_pixels)
+    tiles = make_tiles(img.width, img.height, tile_size, overlap)
+
+    def recognize(box):
+        result = client.predict(_encode_tile(img, box, quality))
+        return offset_ocr_result(result, box[0], box[1])
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        results = OcrResult.concat(executor.map(recognize, tiles))
+
+    if len(tiles) > 1:
+        results = merge_ocr_boxes(results, merge_threshold)
+    return results
+
+
+def _diff_image(img):
+    """ 缩小 DIFF_SCALE 倍的灰度图，用于比较两个版本 """
+    return np.asarray(img.convert('L').reduce(DIFF_SCALE), dtype=np.uint8)
+
+
+def _changed_tiles(tiles, current, previous, diff_threshold, max_changed_pixels):
+    """
+    比较两个版本中每个块对应的区域，灰度差超过 diff_threshold 的像素多于 max_changed_pixels 个即视为该块有变化。
+    """
+    diff = np.abs(current.astype(np.int16) - previous.astype(np.int16)) > diff_threshold
+    changed = []
+    for i, (left, top, right, bottom) in enumerate(tiles):
+        region = diff[top // DIFF_SCALE:-(-bottom // DIFF_SCALE), left // DIFF_SCALE:-(-right // DIFF_SCALE)]
+        if np.count_nonzero(region) > max_changed_pixels:
+            changed.append(i)
+    return changed
+
+
+def _ocr_incremental(image_data, doc_key, client=None, cache=None, tile_size=DEFAULT_TILE_SIZE,
+                     overlap=DEFAULT_OVERLAP, workers=4, merge_threshold=0.5, quality=95, diff_threshold=32,
+                     max_changed_pixels=0, max_pixels=MAX_TILED_PIXELS):
+    """ ocr_incremental 的实现，返回 (识别结果, 重新识别的块数, 总块数) """
+    if overlap >= tile_size:
+        raise ValueError("overlap must be smaller than tile_size")
+    client = client or get_ocr_client()
+    cache = cache or get_ocr_cache()
+    img = _open_large_image(image_data, max_pixels)
+    tiles = make_tiles(img.width, img.height, tile_size, overlap)
+    pixels = _diff_image(img)
+
+    key = None
+    tile_results = [None] * len(tiles)
+    changed = range(len(tiles))
+    if cache is not None:
+        namespace = "{}|incremental|{}|{}|{}".format(client.cache_namespace, tile_size, overlap, DIFF_SCALE)
+        key = cache.make_key(doc_key.encode('utf8'), namespace)
+        state = cache.get(key)
+        if state is not None and state['size'] == [img.width, img.height]:
+            previous = np.frombuffer(zlib.decompress(base64.b64decode(state['pixels'])), dtype=np.uint8)
+            changed = _changed_tiles(tiles, pixels, previous.reshape(pixels.shape), diff_threshold,
+                                     max_changed_pixels)
+            tile_results = [OcrResult.from_items(result) for result in state['tiles']]
+
+    def recognize(box):
+        result = client.predict(_encode_tile(img, box, quality))
+        return offset_ocr_result(result, box[0], box[1])
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        for i, result in zip(changed, executor.map(recognize, [tiles[i] for i in changed])):
+            tile_results[i] = result
+
+    if key is not None and changed:
+        cache.put(key, {
+            'size': [img.width, img.height],
+            'pixels': base64.b64encode(zlib.compress(pixels.tobytes())).decode('ascii'),
+            'tiles': [result.to_list() for result in tile_results],
+        })
+
+    results = OcrResult.concat(tile_results)
+    if len(tiles) > 1:
+        results = merge_ocr_boxes(results, merge_threshold)
+    return results, len(changed), len(tiles)
+
+
+def ocr_incremental(image_data, doc_key, client=None, cache=None, **kwargs):
+    """
+    增量识别：与缓存中同一文档的上一个版本逐块比较，只重新识别有变化的块，未变化块的文本框直接沿用，
+    识别开销与改动的范围成正比，而不是与整页成正比。
+    两个版本尺寸不同或没有上一个版本时整图切块识别。差异按缩小 DIFF_SCALE 倍的灰度图逐像素比较，
+    原图中一个像素的灰度变化超过 128 就会超过默认的 diff_threshold，改动一个字符也会重新识别；
+    重新导出带来的压缩噪声在缩小后通常不超过 15，不算变化。
+    :param image_data: 图片字节数据。
+    :param doc_key: 标识同一文档不同版本的键，如文件路径。
+    :param cache: 保存上一个版本的 OcrCache，默认为全局共享的缓存，都没有时每次都整图识别。
+    :param diff_threshold: 缩小后的像素灰度差超过该值时视为有变化的像素。
+    :param max_changed_pixels: 一个块中允许的变化像素数，超过时重新识别该块，默认任一像素变化都重新识别。
+    其余参数同 ocr_tiled。
+    :return: OcrResult，按从上到下、从左到右排序。
+    """
+    return _ocr_incremental(image_data, doc_key, client, cache, **kwargs)[0]
+
+
+def ocr_tiled_file(img_file, client=None, **kwargs):
+    """
+    切块识别一个文件，返回与 perform_ocr 相同格式的结果记录，其余参数同 ocr_tiled。
+    """
+    try:
+        return _ocr_record(img_file, ocr_tiled(_read_file(img_file), client, **kwargs))
+    except (OcrError, requests.RequestException, OSError, ValueError) as e:
+        return _ocr_record(img_file, error=e)
+
+
+def ocr_incremental_file(img_file, client=None, cache=None, **kwargs):
+    """
+    以文件路径为文档的键增量识别一个文件，返回与 perform_ocr 相同格式的结果记录，
+    另外带有 'changed_tiles'(重新识别的块数) 和 'tiles'(总块数)。其余参数同 ocr_incremental。
+    """
+    try:
+        results, changed, total = _ocr_incremental(_read_file(img_file), os.path.abspath(img_file), client, cache,
+                                                   **kwargs)
+    except (OcrError, requests.RequestException, OSError, ValueError) as e:
+        return _ocr_record(img_file, error=e)
+    return dict(_ocr_record(img_file, results), changed_tiles=changed, tiles=total)
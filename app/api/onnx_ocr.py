@@ -0,0 +1,225 @@
+import os
+import threading
+import cv2
+import numpy as np
+import onnxruntime
+from onnxruntime.capi.onnxruntime_pybind11_state import Fail, InvalidArgument, InvalidProtobuf, NoSuchFile
+from .ocr_backend import OcrBackend, OcrError, register_backend
+from ..common.ocr_result import OcrResult
+
+_DET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_DET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+# ONNX Runtime 的异常不继承 RuntimeError
+_LOAD_ERRORS = (OSError, Fail, InvalidProtobuf, NoSuchFile)
+_RUN_ERRORS = (Fail, InvalidArgument)
+
+
+@register_backend('onnx')
+class OnnxOcrBackend(OcrBackend):
+    """
+    进程内的 CPU 推理后端，使用 ONNX Runtime 运行本地的 PaddleOCR 模型(DB 文本检测 + CTC 文本识别)，不需要 OCR 服务。
+    :param det_model: 检测模型 .onnx 文件路径。
+    :param rec_model: 识别模型 .onnx 文件路径。
+    :param rec_dict: 识别模型的字典文件，每行一个字符。
+    :param det_limit_side: 检测前把图片最长边缩小到该值。
+    :param det_thresh: 概率图二值化的阈值。
+    :param box_thresh: 文本框内平均概率低于该值时丢弃。
+    :param unclip_ratio: 文本框向外扩张的比例，DB 模型输出的是收缩后的文字区域。
+    :param rec_height: 识别模型输入的高度。
+    :param rec_batch_size: 识别时每批的文本行数。
+    :param threads: 每个推理会话使用的线程数，为 None 时由 ONNX Runtime 决定。
+    """
+
+    def __init__(self, det_model, rec_model, rec_dict, det_limit_side=960, det_thresh=0.3, box_thresh=0.6,
+                 unclip_ratio=1.5, rec_height=48, rec_batch_size=8, threads=None):
+        self.det_model = det_model
+        self.rec_model = rec_model
+        self.rec_dict = rec_dict
+        self.det_limit_side = det_limit_side
+        self.det_thresh = det_thresh
+        self.box_thresh = box_thresh
+        self.unclip_ratio = unclip_ratio
+        self.rec_height = rec_height
+        self.rec_batch_size = rec_batch_size
+        self.threads = threads
+
+        self._det_session = None
+        self._rec_session = None
+        self._characters = None
+        self._load_lock = threading.Lock()
+        # 最近一次 health_check 加载模型失败的异常
+        self.last_error = None
+
+    @property
+    def cache_namespace(self):
+        """ 模型文件变化后旧的缓存不再命中 """
+        stamps = []
+        for path in (self.det_model, self.rec_model, self.rec_dict):
+            try:
+                stat = os.stat(path)
+                stamps.append("{}:{}:{}".format(path, stat.st_size, int(stat.st_mtime)))
+            except OSError:
+                stamps.append(path)
+        return "onnx|{}|{}".format('|'.join(stamps), self.det_limit_side)
+
+    def _load(self):
+        """ 第一次使用时才加载模型，加载较慢，可以通过 start_warm_up 提前在后台完成 """
+        with self._load_lock:
+            if self._rec_session is not None:
+                return
+            options = onnxruntime.SessionOptions()
+            if self.threads:
+                options.intra_op_num_threads = self.threads
+            providers = ['CPUExecutionProvider']
+            det_session = onnxruntime.InferenceSession(self.det_model, options, providers=providers)
+            rec_session = onnxruntime.InferenceSession(self.rec_model, options, providers=providers)
+            with open(self.rec_dict, 'r', encoding='utf8') as file:
+                # 下标 0 为 CTC 的空白符，字典末尾补一个空格
+                characters = [''] + [line.rstrip('\r\n') for line in file] + [' ']
+            self._det_session, self._characters = det_session, characters
+            self._rec_session = rec_session
+
+    def health_check(self):
+        """ 加载模型，模型文件缺失或无法加载时返回 False，异常保存在 last_error 中 """
+        try:
+            self._load()
+        except _LOAD_ERRORS as e:
+            self.last_error = e
+            self.healthy = False
+            return False
+        self.last_error = None
+        self.healthy = True
+        return True
+
+    def predict_batch(self, image_list):
+        try:
+            self._load()
+        except _LOAD_ERRORS as e:
+            raise OcrError("failed to load OCR models: {}".format(e)) from e
+        try:
+            return [self._recognize(_decode_image(image_data)) for image_data in image_list]
+        except _RUN_ERRORS as e:
+            raise OcrError(str(e)) from e
+
+    def _recognize(self, img):
+        boxes = self._detect(img)
+        if not len(boxes):
+            return OcrResult()
+        texts, confidences = [], []
+        crops = [_crop_box(img, box) for box in boxes]
+        for start in range(0, len(crops), self.rec_batch_size):
+            batch_texts, batch_confidences = self._recognize_lines(crops[start:start + self.rec_batch_size])
+            texts.extend(batch_texts)
+            confidences.extend(batch_confidences)
+        keep = [i for i, text in enumerate(texts) if text]
+        return OcrResult([texts[i] for i in keep], [confidences[i] for i in keep], boxes[keep])
+
+    def _detect(self, img):
+        """
+        DB 文本检测，返回按从上到下、从左到右排序的 N x 4 x 2 顶点数组(原图坐标)。
+        """
+        height, width = img.shape[:2]
+        ratio = min(1.0, self.det_limit_side / max(height, width))
+        # 输入尺寸需要是 32 的倍数
+        resized_h = max(32, int(round(height * ratio / 32)) * 32)
+        resized_w = max(32, int(round(width * ratio / 32)) * 32)
+        resized = cv2.resize(img, (resized_w, resized_h))
+        tensor = ((resized.astype(np.float32) / 255 - _DET_MEAN) / _DET_STD).transpose(2, 0, 1)[np.newaxis]
+
+        session = self._det_session
+        prob = session.run(None, {session.get_inputs()[0].name: tensor})[0][0, 0]
+        bitmap = (prob > self.det_thresh).astype(np.uint8)
+        contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+        scale = np.array([width / resized_w, height / resized_h], dtype=np.float32)
+        boxes = []
+        for contour in contours:
+            if len(contour) < 4:
+                continue
+            rect = cv2.minAreaRect(contour)
+            if min(rect[1]) < 3 or _box_score(prob, contour) < self.box_thresh:
+                continue
+            rect = _unclip(rect, self.unclip_ratio)
+            if min(rect[1]) < 5:
+                continue
+            box = _order_points(cv2.boxPoints(rect)) * scale
+            box[:, 0] = np.clip(box[:, 0], 0, width - 1)
+            box[:, 1] = np.clip(box[:, 1], 0, height - 1)
+            boxes.append(box)
+        if not boxes:
+            return np.zeros((0, 4, 2), dtype=np.float32)
+        boxes = np.array(boxes, dtype=np.float32)
+        return boxes[np.lexsort((boxes[:, 0, 0], boxes[:, 0, 1]))]
+
+    def _recognize_lines(self, crops):
+        """
+        识别一批文本行图片，按 CTC 贪心解码，返回 (文字列表, 置信度列表)。
+        """
+        height = self.rec_height
+        widths = [max(1, int(np.ceil(height * crop.shape[1] / crop.shape[0]))) for crop in crops]
+        batch = np.zeros((len(crops), 3, height, max(widths)), dtype=np.float32)
+        for i, (crop, width) in enumerate(zip(crops, widths)):
+            line = cv2.resize(crop, (width, height)).astype(np.float32)
+            batch[i, :, :, :width] = (line / 255 - 0.5).transpose(2, 0, 1) / 0.5
+
+        session = self._rec_session
+        probs = session.run(None, {session.get_inputs()[0].name: batch})[0]
+        indices = probs.argmax(axis=2)
+        scores = probs.max(axis=2)
+
+        texts, confidences = [], []
+        for line_indices, line_scores in zip(indices, scores):
+            # 去掉空白符和连续重复的字符
+            keep = line_indices != 0
+            keep[1:] &= line_indices[1:] != line_indices[:-1]
+            texts.append(''.join(self._characters[i] for i in line_indices[keep] if i < len(self._characters)))
+            confidences.append(float(line_scores[keep].mean()) if keep.any() else 0.0)
+        return texts, confidences
+
+
+def _decode_image(image_data):
+    img = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise OcrError("cannot decode image")
+    return img
+
+
+def _box_score(prob, contour):
+    """ 轮廓内概率的平均值，只在轮廓的外接矩形范围内计算 """
+    x, y, w, h = cv2.boundingRect(contour)
+    mask = np.zeros((h, w), dtype=np.uint8)
+    cv2.fillPoly(mask, [contour.reshape(-1, 2) - [x, y]], 1)
+    return cv2.mean(prob[y:y + h, x:x + w], mask)[0]
+
+
+def _unclip(rect, ratio):
+    """
+    按 DB 的扩张距离 面积 * ratio / 周长 向外扩张最小外接矩形。
+    原实现对多边形做偏移，这里检测框取的就是矩形，直接加宽加高即可，不需要 pyclipper。
+    """
+    center, (w, h), angle = rect
+    distance = w * h * ratio / (2 * (w + h))
+    return center, (w + 2 * distance, h + 2 * distance), angle
+
+
+def _order_points(points):
+    """ 四个顶点按 左上、右上、右下、左下 排列 """
+    points = points[np.argsort(points[:, 0])]
+    left = points[:2][np.argsort(points[:2, 1])]
+    right = points[2:][np.argsort(points[2:, 1])]
+    return np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+
+
+def _crop_box(img, box):
+    """ 透视变换裁出文本行，竖排的行旋转为横排 """
+    width = int(max(np.linalg.norm(box[0] - box[1]), np.linalg.norm(box[2] - box[3])))
+    height = int(max(np.linalg.norm(box[0] - box[3]), np.linalg.norm(box[1] - box[2])))
+    width, height = max(width, 1), max(height, 1)
+    target = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(box.astype(np.float32), target)
+    crop = cv2.warpPerspective(img, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE,
+                               flags=cv2.INTER_CUBIC)
+    if height / width >= 1.5:
+        crop = np.ascontiguousarray(np.rot90(crop))
+    return crop
@@ -1,43 +1,600 @@
+import io
 import os
 import json
+import mmap
+import time
+import binascii
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import requests
-from ..utils.ocrTools import _check_image_file, cv2_to_base64
+from requests.adapters import HTTPAdapter
+from .ocr_backend import OcrBackend, OcrError, register_backend
+from .ocr_endpoints import EndpointPool, LatencyWindow
+from .ocr_limiter import get_ocr_limiter
+from .ocr_metrics import observe, timed
+from .ocr_scheduler import BATCH, get_ocr_scheduler
+from ..common.ocr_result import OcrResult
+from ..utils.ocrTools import _check_image_file, cv2_to_base64, decode_ocr_result, downscale_image, scale_ocr_result
+
+DEFAULT_OCR_URL = "http://127.0.0.1:9998/ocr/prediction"
+DEFAULT_MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+
+class OcrInput:
+    """
+    已经在内存中的待识别图片，可以和文件路径一起作为 iter_ocr / perform_ocr 的输入项。
+    :param name: 结果记录中 'file' 字段的值。
+    :param data: 图片字节数据。
+    :param error: 获取图片时发生的异常，不为 None 时不发送请求，直接记录为识别失败。
+    """
+
+    __slots__ = ('name', 'data', 'error')
+
+    def __init__(self, name, data=b'', error=None):
+        self.name = name
+        self.data = data
+        self.error = error
+
+
+@register_backend('paddle_serving')
+class OcrClient(OcrBackend):
+    """
+    Paddle Serving OCR 客户端，通过带连接池的 Session 复用 keep-alive 连接。
+    :param url: OCR 服务地址，也可以是多个副本的地址列表，请求会分给在途请求最少的可用节点。
+    :param pool_size: 每个节点的连接池大小，即可同时保持的连接数。
+    :param connect_timeout: 建立连接的超时时间(秒)。
+    :param read_timeout: 等待响应的超时时间(秒)。
+    :param model_version: 服务端模型版本，用于区分缓存的识别结果。
+    :param max_side: 上传前把图片最长边缩小到该值，识别结果的坐标会换算回原图，为 None 时上传原图。
+    :param jpeg_quality: 缩小后重新编码的 JPEG 质量。
+    :param max_failures: 连续失败多少次后暂时摘除节点。
+    :param eject_seconds: 节点被摘除后每隔多久探测一次。
+    :param deadline: 每次识别(含重试)的总时限(秒)，为 None 时只受 connect_timeout 和 read_timeout 限制。
+    :param retries: 网络错误时的重试次数，重试前按指数退避并加入随机抖动。
+    :param backoff: 第一次重试前的最长等待时间(秒)。
+    :param hedge: 请求耗时超过最近的 p95 时，向另一个节点(或另一条连接)再发一份相同的请求，采用先返回的结果。
+    """
+
+    def __init__(self, url=DEFAULT_OCR_URL, pool_size=8, connect_timeout=3.0, read_timeout=60.0, model_version='',
+                 max_side=None, jpeg_quality=90, max_failures=3, eject_seconds=10.0,
+                 deadline=None, retries=2, backoff=0.2, hedge=False):
+        urls = [url] if isinstance(url, str) else list(url)
+        self.url = urls[0]
+        self.endpoints = EndpointPool(urls, max_failures, eject_seconds, self._probe)
+        self.model_version = model_version
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge = hedge
+        self.latency = LatencyWindow()
+        # 服务端是否支持多图请求，None 表示还不知道
+        self.batch_supported = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(urls), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # 对冲请求需要在调用线程之外发送，每个调用最多同时占用两个线程
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size * 2) if hedge else None
+
+    def predict(self, image_data, deadline=None):
+        """
+        识别一张图片。
+        :param image_data: 图片文件的字节数据。
+        :param deadline: 本次识别的总时限(秒)，默认使用客户端的 deadline。
+        :return: OcrResult 识别结果。
+        """
+        return self.predict_batch([image_data], deadline)[0]
+
+    def predict_batch(self, image_list, deadline=None):
+        """
+        在一个请求中识别多张图片，服务端不支持多图请求时逐张发送。
+        :param image_list: 图片字节数据列表。
+        :param deadline: 本次识别的总时限(秒)，默认使用客户端的 deadline。
+        :return: 与输入顺序一致的识别结果列表。
+        """
+        deadline = self.deadline if deadline is None else deadline
+        expires = time.monotonic() + deadline if deadline else None
+
+        image_list, scales = _preprocess(image_list, self.max_side, self.jpeg_quality)
+
+        if len(image_list) == 1 or self.batch_supported:
+            results = self._request(image_list, expires)
+        elif self.batch_supported is False:
+            results = [self._request([image], expires)[0] for image in image_list]
+        else:
+            # 官方的 pdserving 服务每个请求只识别 "image" 键对应的一张图片，多图请求会出错或只返回一个结果，
+            # 第一次多图请求失败时逐张重发，逐张都成功说明服务端不支持多图请求，之后直接逐张发送
+            try:
+                results = self._request(image_list, expires)
+                self.batch_supported = True
+            except OcrError:
+                results = [self._request([image], expires)[0] for image in image_list]
+                self.batch_supported = False
+
+        return _restore_scale(results, scales)
+
+    def _request(self, image_list, expires):
+        """
+        发送一个请求，网络错误时按指数退避重试。
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                if self.hedge:
+                    return self._post_hedged(image_list, expires)
+                return self._post(self.endpoints.acquire(), image_list, expires)
+            except requests.RequestException:
+                # 完全随机抖动的指数退避，避免大量请求同时重试
+                delay = random.uniform(0, self.backoff * 2 ** attempt)
+                if attempt == self.retries or (expires is not None and time.monotonic() + delay >= expires):
+                    raise
+                time.sleep(delay)
+
+    def _post(self, endpoint, image_list, expires):
+        """
+        向已经 acquire 的节点发送请求，结束后释放节点并记录耗时。
+        每次发送都新建一个流式请求体，重试和对冲请求互不影响。
+        """
+        ok = False
+        try:
+            timeout = self.timeout
+            if expires is not None:
+                remaining = expires - time.monotonic()
+                if remaining <= 0:
+                    raise requests.Timeout("OCR deadline exceeded")
+                timeout = (min(self.timeout[0], remaining), min(self.timeout[1], remaining))
+
+            start = time.monotonic()
+            body = _RequestBody(image_list)
+            response = self.session.post(url=endpoint.url, data=body, timeout=timeout)
+            # 请求体边发送边编码，网络耗时中扣除编码的部分
+            observe('network', time.monotonic() - start - body.encode_time)
+            observe('encode', body.encode_time)
+            observe('request_bytes', len(body))
+            observe('response_bytes', len(response.content))
+            observe('images', len(image_list))
+            with timed('json'):
+                result = response.json()
+            results = _parse_response(result, len(image_list))
+            self.latency.add(time.monotonic() - start)
+            ok = True
+        finally:
+            self.endpoints.release(endpoint, ok)
+        return results
+
+    def _post_hedged(self, image_list, expires):
+        """
+        先发送一次请求，超过最近的 p95 耗时仍未返回时再向另一个节点发送一次，采用先成功的结果。
+        样本不足 20 个时不对冲。未被采用的请求在后台自然结束。
+        """
+        primary = self.endpoints.acquire()
+        futures = [self._hedge_executor.submit(self._post, primary, image_list, expires)]
+
+        hedge_delay = self.latency.percentile(95) if len(self.latency) >= 20 else None
+        if hedge_delay is not None:
+            if expires is not None:
+                hedge_delay = min(hedge_delay, max(expires - time.monotonic(), 0))
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                secondary = self.endpoints.acquire(exclude=primary)
+                futures.append(self._hedge_executor.submit(self._post, secondary, image_list, expires))
+
+        pending = set(futures)
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+            if not pending:
+                return done.pop().result()
+
+    def ocr_file(self, img_file, deadline=None):
+        return self.predict(_map_file(img_file), deadline)
+
+    @property
+    def cache_namespace(self):
+        """ 缓存键的命名空间，服务地址或模型版本变化后旧的缓存不再命中 """
+        return "{}|{}|{}|{}".format(','.join(self.endpoints.urls), self.model_version, self.max_side, self.jpeg_quality)
+
+    def health_check(self):
+        """
+        检查各节点是否可达，顺带在连接池中建立连接，不可达的节点会被暂时摘除。
+        :return: 是否至少有一个节点可达。
+        """
+        healthy = False
+        for endpoint in self.endpoints.endpoints:
+            ok = self._probe(endpoint.url)
+            self.endpoints.mark(endpoint, ok)
+            healthy = healthy or ok
+        self.healthy = healthy
+        return healthy
+
+    def _probe(self, url):
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            # 读完响应体，连接才会放回连接池
+            response.content
+        except requests.RequestException:
+            return False
+        return True
+
+    def close(self):
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_ocr_client():
+    """ 获取全局共享的 OCR 后端，未设置时使用默认地址创建 OcrClient """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = OcrClient()
+        return _default_client
+
+
+def set_ocr_client(client):
+    """ 替换全局共享的 OCR 后端，可以是任意 OcrBackend """
+    global _default_client
+    with _default_client_lock:
+        old_client, _default_client = _default_client, client
+    if old_client is not None and old_client is not client:
+        old_client.close()
+    return client
+
+
+def _read_file(img_file):
+    with open(img_file, 'rb') as file:
+        return file.read()
+
+
+def _map_file(img_file):
+    """
+    以只读方式把文件映射到内存，发送时直接从映射区编码，不必先把整个文件读成 bytes。
+    映射在最后一个引用释放时自动关闭。空文件无法映射，返回空字节串。
+    """
+    with open(img_file, 'rb') as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b''
 
-def format_ocr_result(ocr_result):
-    formatted_result = []
-    for item in ocr_result:
-        text = item[0][0]
-        confidence = item[0][1]
-        coordinates = item[1]
-        formatted_result.append({
-            'text': text,
-            'confidence': confidence,
-            'text_region': coordinates
-        })
-    return formatted_result
-
-def perform_ocr(img_path_list):
-    url = "http://127.0.0.1:9998/ocr/prediction"
-    ocr_results = []  # List to store results from all images
 
+def _preprocess(image_list, max_side, quality):
+    """
+    按需缩小图片，返回 (待上传的图片列表, 各图片的缩放比例)。
+    """
+    if not max_side:
+        return image_list, [1.0] * len(image_list)
+    with timed('preprocess'):
+        pairs = [downscale_image(image_data, max_side, quality) for image_data in image_list]
+    return [image for image, _ in pairs], [scale for _, scale in pairs]
+
+
+def _restore_scale(results, scales):
+    """ 把缩小后图片上的坐标换算回原图 """
+    return [scale_ocr_result(result, 1 / scale) for result, scale in zip(results, scales)]
+
+
+def _request_keys(count):
+    """ 单张图片沿用 "image" 键，多张图片依次使用 "image_0"、"image_1"... 作为键 """
+    if count == 1:
+        return ["image"]
+    return ["image_{}".format(i) for i in range(count)]
+
+
+def _build_request_body(image_list):
+    """
+    构造 /ocr/prediction 的请求体。
+    """
+    data = {"key": _request_keys(len(image_list)), "value": [cv2_to_base64(image) for image in image_list]}
+    return json.dumps(data)
+
+
+class _RequestBody(io.RawIOBase):
+    """
+    与 _build_request_body 内容相同的只读流。
+    图片数据只在被读取时逐块做 base64 编码，不会在内存中拼出完整的 base64 字符串和 JSON 请求体，
+    requests 通过 len() 得到 Content-Length 后边读边写入 socket。
+    :param image_list: 图片数据列表，可以是 bytes、mmap 等任何支持缓冲区协议的对象。
+    """
+
+    # 3 的倍数，使各块的 base64 编码可以直接拼接
+    CHUNK_SIZE = 3 * 16 * 1024
+
+    def __init__(self, image_list):
+        super().__init__()
+        head = '{{"key": {}, "value": ["'.format(json.dumps(_request_keys(len(image_list))))
+        self._segments = [head.encode('utf8')]
+        for i, image in enumerate(image_list):
+            if i:
+                self._segments.append(b'", "')
+            self._segments.append(memoryview(image))
+        self._segments.append(b'"]}')
+        # 累计的 base64 编码耗时(秒)
+        self.encode_time = 0.0
+
+        self._length = sum(
+            len(segment) if isinstance(segment, bytes) else (len(segment) + 2) // 3 * 4
+            for segment in self._segments
+        )
+        self.seek(0)
+
+    def __len__(self):
+        return self._length
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """ 只支持回到开头和查询当前位置 """
+        if offset == 0 and whence == io.SEEK_CUR:
+            return self._position
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only rewind to the beginning")
+        self._index = 0
+        self._offset = 0
+        self._pending = memoryview(b'')
+        self._position = 0
+        return 0
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        n = 0
+        while n < size:
+            if not self._pending and not self._next_chunk():
+                break
+            k = min(size - n, len(self._pending))
+            buffer[n:n + k] = self._pending[:k]
+            self._pending = self._pending[k:]
+            n += k
+        self._position += n
+        return n
+
+    def _next_chunk(self):
+        while self._index < len(self._segments):
+            segment = self._segments[self._index]
+            if isinstance(segment, bytes):
+                self._index += 1
+                self._pending = memoryview(segment)
+                return True
+            if self._offset < len(segment):
+                chunk = segment[self._offset:self._offset + self.CHUNK_SIZE]
+                self._offset += len(chunk)
+                start = time.perf_counter()
+                self._pending = memoryview(binascii.b2a_base64(chunk, newline=False))
+                self.encode_time += time.perf_counter() - start
+                return True
+            self._index += 1
+            self._offset = 0
+        return False
+
+
+def _parse_response(result, count=1):
+    """
+    解析 /ocr/prediction 的响应，服务端出错时抛出 OcrError。
+    服务端按请求中图片的顺序在 value 中逐张返回识别结果，官方的 pdserving 服务只返回一个 "result" 键，
+    结果数与图片数不一致时同样抛出 OcrError。
+    """
+    if result["err_no"] != 0:
+        raise OcrError(result["err_msg"])
+    values = result["value"]
+    if len(values) != count:
+        raise OcrError("expected {} results, got {}".format(count, len(values)))
+    with timed('decode'):
+        raw_results = [decode_ocr_result(value) for value in values]
+    with timed('format'):
+        results = [format_ocr_result(raw_result) for raw_result in raw_results]
+    for formatted_res in results:
+        observe('boxes', len(formatted_res))
+    return results
+
+
+def _make_batches(img_path_list, batch_size, max_batch_bytes):
+    """
+    按图片数量和 base64 编码后的大小把文件列表切分成若干批次，超过大小上限的单个文件单独成批。
+    """
+    batch, batch_bytes = [], 0
     for img_file in img_path_list:
-        with open(img_file, 'rb') as file:
-            image_data = file.read()
-
-        image = cv2_to_base64(image_data)
-        data = {"key": ["image"], "value": [image]}
-        response = requests.post(url=url, data=json.dumps(data))
-        result = response.json()
-
-        if result["err_no"] == 0:
-            ocr_result = eval(result["value"][0])
-            formatted_res = format_ocr_result(ocr_result)
-            ocr_results.append({
-                'file': img_file,
-                'ocr_result': formatted_res
-            })
+        try:
+            length = len(img_file.data) if isinstance(img_file, OcrInput) else os.path.getsize(img_file)
+            size = (length + 2) // 3 * 4
+        except OSError:
+            size = 0
+        if batch and (len(batch) >= batch_size or batch_bytes + size > max_batch_bytes):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(img_file)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+def format_ocr_result(ocr_result):
+    """
+    把服务端返回的 [(text, confidence), text_region] 列表转换为 OcrResult。
+    OcrResult 可以像原先的 {'text', 'confidence', 'text_region'} 字典列表一样按下标和迭代访问。
+    """
+    return OcrResult.from_raw(ocr_result)
+
+def _ocr_record(img_file, formatted_res=None, error=None):
+    if error is not None:
+        return {
+            'file': img_file,
+            'ocr_result': OcrResult(),
+            'error': str(error) or type(error).__name__
+        }
+    return {
+        'file': img_file,
+        'ocr_result': formatted_res
+    }
+
+def _ocr_batch(client, img_files, cache=None, similar=None, limiter=None, prefilter=None):
+    """
+    在一个请求中识别一批文件，失败时把错误信息记录在对应文件的结果中而不是抛出。
+    命中缓存、与已识别图片近似重复或被 prefilter 判断为没有文字的文件不再编码和发送，
+    只有真正发送请求时才占用 limiter 的名额。
+    """
+    records = [None] * len(img_files)
+    names = [img_file.name if isinstance(img_file, OcrInput) else img_file for img_file in img_files]
+    image_list, indexes, keys, signatures = [], [], [], []
+    for i, img_file in enumerate(img_files):
+        if isinstance(img_file, OcrInput):
+            if img_file.error is not None:
+                records[i] = _ocr_record(names[i], error=img_file.error)
+                continue
+            image_data = img_file.data
+        else:
+            try:
+                with timed('read'):
+                    image_data = _map_file(img_file)
+            except OSError as e:
+                records[i] = _ocr_record(names[i], error=e)
+                continue
+
+        if cache is not None:
+            key = cache.make_key(image_data, client.cache_namespace)
+            cached_res = cache.get(key)
+            if cached_res is not None:
+                records[i] = _ocr_record(names[i], OcrResult.from_items(cached_res))
+                continue
+
+        if similar is not None:
+            signature = similar.signature(image_data)
+            similar_res = similar.lookup(signature, client.cache_namespace) if signature is not None else None
+            if similar_res is not None:
+                # 复用的是另一张图片的结果，不写入按内容寻址的缓存
+                records[i] = _ocr_record(names[i], similar_res)
+                continue
+
+        if prefilter is not None and prefilter.should_skip(image_data):
+            # 跳过的结果不写入缓存，调整阈值后可以重新识别
+            records[i] = dict(_ocr_record(names[i], OcrResult()), skipped=True)
+            continue
+
+        if cache is not None:
+            keys.append(key)
+        if similar is not None:
+            signatures.append(signature)
+        image_list.append(image_data)
+        indexes.append(i)
+
+    if image_list:
+        try:
+            if limiter is not None:
+                with limiter.slot(len(image_list)):
+                    results = client.predict_batch(image_list)
+            else:
+                results = client.predict_batch(image_list)
+        except (OcrError, requests.RequestException, OSError, ValueError) as e:
+            for i in indexes:
+                records[i] = _ocr_record(names[i], error=e)
         else:
-            print("Error processing file {}: {}".format(img_file, result["err_msg"]))
+            for i, formatted_res in zip(indexes, results):
+                records[i] = _ocr_record(names[i], formatted_res)
+            if cache is not None:
+                for key, formatted_res in zip(keys, results):
+                    cache.put(key, formatted_res.to_list())
+            if similar is not None:
+                for signature, formatted_res in zip(signatures, results):
+                    if signature is not None:
+                        similar.add(signature, formatted_res, client.cache_namespace)
+
+    return records
+
+def iter_ocr(img_path_list, client=None, workers=1, batch_size=1, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+             cache=None, ordered=True, max_pending=None, similar=None, scheduler=None, priority=BATCH,
+             limiter=None, prefilter=None):
+    """
+    逐个产出识别结果的生成器，每个文件的结果一就绪就产出，输入也按需逐个读取，可以是任意可迭代对象，
+    其中每一项是文件路径或 OcrInput。
+    参数与 perform_ocr 相同，另外：
+    :param ordered: 为 True 时按输入顺序产出，为 False 时按完成顺序产出。
+    :param max_pending: 最多提前提交多少个批次(含已完成但尚未取走的)，默认为 workers 的两倍，
+                        内存占用因此与输入总量无关。
+    """
+    client = client or get_ocr_client()
+    scheduler = scheduler or get_ocr_scheduler()
+    if priority == BATCH:
+        limiter = limiter or get_ocr_limiter()
+    batches = _make_batches(img_path_list, batch_size, max_batch_bytes)
+
+    if scheduler is None and workers <= 1:
+        for batch in batches:
+            yield from _ocr_batch(client, batch, cache, similar, limiter, prefilter)
+        return
+
+    max_pending = max(max_pending or workers * 2, 1)
+    executor = ThreadPoolExecutor(max_workers=workers) if scheduler is None else None
+    pending = deque()
+    try:
+        for batch in batches:
+            if len(pending) >= max_pending:
+                yield from _pop_finished(pending, ordered)
+            if executor is None:
+                future = scheduler.submit(_ocr_batch, client, batch, cache, similar, limiter, prefilter,
+                                          priority=priority, cost=len(batch))
+            else:
+                future = executor.submit(_ocr_batch, client, batch, cache, similar, limiter, prefilter)
+            pending.append(future)
+        while pending:
+            yield from _pop_finished(pending, ordered)
+    finally:
+        # 生成器提前关闭时不再发送尚未开始的请求
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+        for future in pending:
+            future.cancel()
 
-    return ocr_results
+def _pop_finished(pending, ordered):
+    """
+    从 pending 中取出一个批次的结果：按顺序时等待队首，否则取任意已完成的批次。
+    """
+    if ordered:
+        return pending.popleft().result()
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    future = next(iter(done))
+    pending.remove(future)
+    return future.result()
 
+def perform_ocr(img_path_list, client=None, workers=1, batch_size=1, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                cache=None, similar=None, scheduler=None, priority=BATCH, limiter=None, prefilter=None):
+    """
+    识别一组图片。
+    :param img_path_list: 图片路径列表。
+    :param client: 使用的 OCR 后端(OcrBackend)，默认为全局共享的后端。
+    :param workers: 同时在途的请求数，大于 1 时用线程池并发识别，不宜超过客户端的连接池大小。
+    :param batch_size: 每个请求最多打包的图片数量。
+    :param max_batch_bytes: 每个请求中图片 base64 编码后的总大小上限。
+    :param cache: 可选的 OcrCache，命中时直接返回缓存的识别结果。
+    :param similar: 可选的 PerceptualIndex，与已识别图片重复(同尺寸的重新保存、重新压缩副本)时复用其结果。
+                    复用的结果可能与图片中的文字不完全一致，不要用于打码等必须逐字准确的识别。
+    :param scheduler: 提交请求的 OcrScheduler，默认为全局共享的调度器，都没有时 workers 大于 1 才使用线程池。
+                      使用调度器时实际并发数由调度器决定，workers 只影响默认的 max_pending。
+    :param priority: 在调度器中的优先级类别，界面上等待结果的识别应使用 INTERACTIVE。
+    :param limiter: 限制在途请求数的 AdaptiveLimiter，批量识别默认使用全局共享的限流器，
+                    此时 workers(或调度器的线程数)只是并发的上限。
+    :param prefilter: 可选的 TextPrefilter，识别前判断有没有文字，只在显式传入时使用，
+                      被跳过的文件 'ocr_result' 为空并带有 'skipped': True。
+    :return: 与输入顺序一致的结果列表，'ocr_result' 为 OcrResult，识别失败的文件带有 'error' 字段且 'ocr_result' 为空。
+    """
+    return list(iter_ocr(img_path_list, client, workers, batch_size, max_batch_bytes, cache,
+                         similar=similar, scheduler=scheduler, priority=priority, limiter=limiter,
+                         prefilter=prefilter))
@@ -0,0 +1,128 @@
+import json
+import asyncio
+import aiohttp
+from .ocr_endpoints import EndpointPool
+from .paddle_ocr import (DEFAULT_OCR_URL, OcrError, _read_file, _ocr_record, _preprocess, _restore_scale,
+                         _build_request_body, _parse_response)
+
+
+def _decode_response(content, count):
+    return _parse_response(json.loads(content), count)
+
+
+class AsyncOcrClient:
+    """
+    基于 asyncio 的 Paddle Serving OCR 客户端，用信号量限制同时在途的请求数。
+    :param url: OCR 服务地址或多个副本的地址列表，负载均衡与节点摘除方式同 OcrClient。
+    :param concurrency: 同时在途的请求数上限，同时也是连接池大小。
+    :param connect_timeout: 建立连接的超时时间(秒)。
+    :param read_timeout: 等待响应的超时时间(秒)。
+    :param max_side: 上传前把图片最长边缩小到该值，与 OcrClient 相同。
+    :param jpeg_quality: 缩小后重新编码的 JPEG 质量。
+    """
+
+    def __init__(self, url=DEFAULT_OCR_URL, concurrency=8, connect_timeout=3.0, read_timeout=60.0,
+                 max_side=None, jpeg_quality=90, max_failures=3, eject_seconds=10.0):
+        urls = [url] if isinstance(url, str) else list(url)
+        self.url = urls[0]
+        self.endpoints = EndpointPool(urls, max_failures, eject_seconds)
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.concurrency = concurrency
+        self.timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        # 服务端是否支持多图请求，None 表示还不知道
+        self.batch_supported = None
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def predict(self, image_data, timeout=None):
+        """
+        识别一张图片。
+        :param image_data: 图片文件的字节数据。
+        :param timeout: 单个请求的总超时时间(秒)，不包括排队等待信号量的时间。
+        :return: OcrResult 识别结果。
+        """
+        return (await self.predict_batch([image_data], timeout))[0]
+
+    async def predict_batch(self, image_list, timeout=None):
+        """
+        在一个请求中识别多张图片，返回与输入顺序一致的识别结果列表。
+        服务端不支持多图请求时逐张发送，判断方式同 OcrClient.predict_batch。
+        """
+        async with self.semaphore:
+            if len(image_list) == 1 or self.batch_supported:
+                return await self._predict_batch(image_list, timeout)
+            if self.batch_supported is None:
+                try:
+                    results = await self._predict_batch(image_list, timeout)
+                    self.batch_supported = True
+                    return results
+                except OcrError:
+                    pass
+            results = [(await self._predict_batch([image], timeout))[0] for image in image_list]
+            self.batch_supported = False
+            return results
+
+    async def _predict_batch(self, image_list, timeout):
+        # 缩小、编码和解析结果都是 CPU 密集的操作，放到线程中执行，不阻塞事件循环
+        image_list, scales = await asyncio.to_thread(_preprocess, image_list, self.max_side, self.jpeg_quality)
+        body = await asyncio.to_thread(_build_request_body, image_list)
+        endpoint = self.endpoints.acquire()
+        ok = False
+        try:
+            async with asyncio.timeout(timeout):
+                async with self._get_session().post(endpoint.url, data=body) as response:
+                    content = await response.read()
+            results = await asyncio.to_thread(_decode_response, content, len(image_list))
+            ok = True
+        finally:
+            self.endpoints.release(endpoint, ok)
+        return _restore_scale(results, scales)
+
+    async def ocr_file(self, img_file, timeout=None):
+        # 在信号量内读取文件，同时驻留在内存中的图片数不超过并发上限
+        async with self.semaphore:
+            image_data = await asyncio.to_thread(_read_file, img_file)
+            return (await self._predict_batch([image_data], timeout))[0]
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+async def _ocr_record_async(client, img_file, timeout):
+    try:
+        formatted_res = await client.ocr_file(img_file, timeout)
+    except (OcrError, aiohttp.ClientError, TimeoutError, OSError, ValueError) as e:
+        return _ocr_record(img_file, error=e)
+    return _ocr_record(img_file, formatted_res)
+
+
+async def perform_ocr_async(img_path_list, client=None, concurrency=8, timeout=None):
+    """
+    perform_ocr 的异步版本，所有请求在同一个事件循环中并发。
+    取消该协程会同时取消所有尚未完成的请求。
+    :param img_path_list: 图片路径列表。
+    :param client: 使用的 AsyncOcrClient，为 None 时临时创建一个并在结束后关闭。
+    :param concurrency: 临时创建客户端时的并发上限。
+    :param timeout: 单个请求的超时时间(秒)。
+    :return: 与 perform_ocr 相同格式、与输入顺序一致的结果列表。
+    """
+    if client is not None:
+        return await asyncio.gather(*(_ocr_record_async(client, f, timeout) for f in img_path_list))
+
+    async with AsyncOcrClient(concurrency=concurrency) as client:
+        return await asyncio.gather(*(_ocr_record_async(client, f, timeout) for f in img_path_list))
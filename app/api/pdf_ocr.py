@@ -0,0 +1,44 @@
+import PyPDF2
+from PyPDF2.errors import PyPdfError
+from .paddle_ocr import OcrInput, iter_ocr
+
+
+def iter_pdf_images(pdf_path):
+    """
+    逐页取出 PDF 中嵌入的图片(扫描件每页通常就是一张图片)，只在需要下一页时才解析该页。
+    :return: 生成 OcrInput，name 为 (页码, 图片名)，页码从 1 开始；某页图片无法解码时该页产生一个带 error 的输入项。
+    """
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        for page_number, page in enumerate(reader.pages, 1):
+            try:
+                images = page.images
+            except (PyPdfError, NotImplementedError, ValueError, KeyError) as e:
+                yield OcrInput((page_number, None), error=e)
+                continue
+            for image in images:
+                yield OcrInput((page_number, image.name), image.data)
+
+
+def iter_pdf_ocr(pdf_path, client=None, workers=4, cache=None, ordered=True, max_pending=None):
+    """
+    并发识别扫描版 PDF 中每一页的图片，结果一就绪就产出。
+    同时在内存中的页数受 max_pending 限制，与 PDF 的总页数无关。
+    :param pdf_path: PDF 文件路径。
+    :return: 生成 {'file', 'page', 'image', 'ocr_result'} 记录，识别失败时带有 'error' 字段。
+    """
+    images = iter_pdf_images(pdf_path)
+    for record in iter_ocr(images, client, workers, cache=cache, ordered=ordered, max_pending=max_pending):
+        page_number, image_name = record['file']
+        yield dict(record, file=pdf_path, page=page_number, image=image_name)
+
+
+def perform_pdf_ocr(pdf_path, client=None, workers=4, cache=None):
+    """
+    识别扫描版 PDF 的所有页面。
+    :return: {页码: [该页各图片的识别记录]}，页码从 1 开始。
+    """
+    pages = {}
+    for record in iter_pdf_ocr(pdf_path, client, workers, cache):
+        pages.setdefault(record['page'], []).append(record)
+    return pages
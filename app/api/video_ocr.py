@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+from .paddle_ocr import OcrInput, iter_ocr
+
+DEFAULT_SAMPLE_RATE = 1.0
+# 缩小后的像素灰度差超过该值时视为变化的像素
+DEFAULT_DIFF_THRESHOLD = 32
+# 变化的像素多于该数量时视为内容有变化，新出现一行小字也远多于该值
+DEFAULT_MAX_CHANGED_PIXELS = 8
+
+
+def _frame_signature(frame, scale):
+    """ 缩小 scale 倍的灰度图，每个像素是原帧对应区域的平均值，用来逐像素比较两帧内容的差异 """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    if scale > 1:
+        size = (max(1, gray.shape[1] // scale), max(1, gray.shape[0] // scale))
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return gray.astype(np.int16)
+
+
+def _frame_changed(signature, last_signature, diff_threshold, max_changed_pixels):
+    if last_signature is None or signature.shape != last_signature.shape:
+        return True
+    changed = np.count_nonzero(np.abs(signature - last_signature) > diff_threshold)
+    return changed > max_changed_pixels
+
+
+def iter_video_frames(video_path, sample_rate=DEFAULT_SAMPLE_RATE, diff_threshold=DEFAULT_DIFF_THRESHOLD,
+                      max_changed_pixels=DEFAULT_MAX_CHANGED_PIXELS, diff_scale=2, quality=95):
+    """
+    流式解码视频，按 sample_rate 抽帧，跳过与上一个送去识别的帧几乎相同的帧。
+    两帧缩小 diff_scale 倍后逐像素比较，只看变化的像素数而不是平均差，画面一角新出现一行小字也会识别。
+    未被抽中的帧只 grab 不解码。
+    :param video_path: 视频文件路径。
+    :param sample_rate: 每秒抽取的帧数。
+    :param diff_threshold: 缩小后的像素灰度差超过该值时视为变化的像素，视频压缩噪声通常在该值以下。
+    :param max_changed_pixels: 变化的像素不超过该数量时视为内容未变化，为负数时不跳过任何帧。
+    :param diff_scale: 比较差异时把帧缩小的倍数。
+    :param quality: 帧编码为 JPEG 的质量。
+    :return: 生成 OcrInput，name 为 (帧序号, 时间戳秒)。
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise OSError("cannot open video: {}".format(video_path))
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+        step = max(1, int(round(fps / sample_rate)))
+        last_signature = None
+        frame_index = -1
+        while True:
+            frame_index += 1
+            if frame_index % step:
+                if not capture.grab():
+                    break
+                continue
+            ok, frame = capture.read()
+            if not ok:
+                break
+
+            signature = _frame_signature(frame, diff_scale)
+            if not _frame_changed(signature, last_signature, diff_threshold, max_changed_pixels):
+                continue
+            last_signature = signature
+
+            ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ok:
+                yield OcrInput((frame_index, frame_index / fps), buffer.tobytes())
+            else:
+                yield OcrInput((frame_index, frame_index / fps), error=ValueError("cannot encode frame"))
+    finally:
+        capture.release()
+
+
+def iter_video_ocr(video_path, client=None, sample_rate=DEFAULT_SAMPLE_RATE, diff_threshold=DEFAULT_DIFF_THRESHOLD,
+                   workers=4, cache=None, ordered=True, max_pending=None, max_changed_pixels=DEFAULT_MAX_CHANGED_PIXELS):
+    """
+    识别视频中内容有变化的帧，识别次数随内容变化的次数增长，而不是随帧数增长。
+    同时在内存中的帧数受 max_pending 限制，与视频长度无关。
+    :param video_path: 视频文件路径，其余抽帧参数见 iter_video_frames。
+    :return: 生成 {'file', 'frame', 'time', 'ocr_result'} 记录，time 为帧在视频中的时间(秒)，识别失败时带有 'error' 字段。
+    """
+    frames = iter_video_frames(video_path, sample_rate, diff_threshold, max_changed_pixels)
+    for record in iter_ocr(frames, client, workers, cache=cache, ordered=ordered, max_pending=max_pending):
+        frame_index, timestamp = record['file']
+        yield dict(record, file=video_path, frame=frame_index, time=timestamp)
+
+
+def perform_video_ocr(video_path, client=None, sample_rate=DEFAULT_SAMPLE_RATE,
+                      diff_threshold=DEFAULT_DIFF_THRESHOLD, workers=4, cache=None,
+                      max_changed_pixels=DEFAULT_MAX_CHANGED_PIXELS):
+    """
+    识别整个视频，返回按时间排序的识别记录列表。
+    """
+    return list(iter_video_ocr(video_path, client, sample_rate, diff_threshold, workers, cache,
+                               max_changed_pixels=max_changed_pixels))
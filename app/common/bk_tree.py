@@ -0,0 +1,60 @@
+# coding: utf-8
+
+
+def hamming_distance(a: int, b: int):
+    """ 两个整数哈希值的汉明距离 """
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    BK 树，按度量距离查找与给定键相近的所有项，默认用于整数哈希值的汉明距离。
+    查找半径 r 时，只需访问与当前节点距离在 [d - r, d + r] 内的子树。
+    """
+
+    def __init__(self, distance=hamming_distance):
+        self.distance = distance
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, key, value=None):
+        """ 插入一项，键相同的项也会保留 """
+        node = [key, value, {}]
+        self.size += 1
+        if self.root is None:
+            self.root = node
+            return
+
+        parent = self.root
+        while True:
+            d = self.distance(key, parent[0])
+            child = parent[2].get(d)
+            if child is None:
+                parent[2][d] = node
+                return
+            parent = child
+
+    def search(self, key, radius):
+        """
+        查找与 key 的距离不超过 radius 的所有项。
+        :return: [(距离, 键, 值)] 列表，按距离从小到大排序。
+        """
+        if self.root is None:
+            return []
+
+        results = []
+        stack = [self.root]
+        while stack:
+            node_key, value, children = stack.pop()
+            d = self.distance(key, node_key)
+            if d <= radius:
+                results.append((d, node_key, value))
+            for child_d, child in children.items():
+                if d - radius <= child_d <= d + radius:
+                    stack.append(child)
+
+        results.sort(key=lambda item: item[0])
+        return results
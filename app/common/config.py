@@ -53,6 +53,37 @@ class Config(QConfig):
     # software update
     checkUpdateAtStartUp = ConfigItem("Update", "CheckUpdateAtStartUp", True, BoolValidator())
 
+    # ocr backend: "paddle_serving" talks to the ocr service, "onnx" runs local models in process
+    ocrBackend = OptionsConfigItem(
+        "OCR", "Backend", "paddle_serving", OptionsValidator(["paddle_serving", "onnx"]), restart=True)
+    ocrDetModel = ConfigItem("OCR", "DetModel", "app/resource/models/det.onnx")
+    ocrRecModel = ConfigItem("OCR", "RecModel", "app/resource/models/rec.onnx")
+    ocrRecDict = ConfigItem("OCR", "RecDict", "app/resource/models/ppocr_keys_v1.txt")
+    ocrThreads = RangeConfigItem("OCR", "Threads", 0, RangeValidator(0, 64))
+
+    # ocr service, several replicas can be given as comma separated urls
+    ocrEndpoint = ConfigItem("OCR", "Endpoint", "http://127.0.0.1:9998/ocr/prediction")
+    ocrPoolSize = RangeConfigItem("OCR", "PoolSize", 8, RangeValidator(1, 64))
+    ocrConnectTimeout = RangeConfigItem("OCR", "ConnectTimeout", 3, RangeValidator(1, 60))
+    ocrReadTimeout = RangeConfigItem("OCR", "ReadTimeout", 60, RangeValidator(1, 600))
+    ocrDeadline = RangeConfigItem("OCR", "Deadline", 0, RangeValidator(0, 600))
+    ocrRetries = RangeConfigItem("OCR", "Retries", 2, RangeValidator(0, 10))
+    ocrHedgeEnabled = ConfigItem("OCR", "HedgeEnabled", False, BoolValidator())
+    # batch ocr adapts its in-flight requests between 1 and the pool size
+    ocrAdaptiveConcurrency = ConfigItem("OCR", "AdaptiveConcurrency", True, BoolValidator())
+    ocrModelVersion = ConfigItem("OCR", "ModelVersion", "")
+    ocrMaxSide = RangeConfigItem("OCR", "MaxSide", 0, RangeValidator(0, 20000))
+    ocrJpegQuality = RangeConfigItem("OCR", "JpegQuality", 90, RangeValidator(10, 100))
+    ocrCacheFolder = ConfigItem("OCR", "CacheFolder", "app/cache/ocr", FolderValidator())
+    ocrCacheSize = RangeConfigItem("OCR", "CacheSize", 256, RangeValidator(0, 10240))
+    # folder ocr reuses results of same-size resaved or recompressed copies,
+    # not safe for redaction: a copy with a few characters changed can still match
+    ocrDedupEnabled = ConfigItem("OCR", "DedupEnabled", False, BoolValidator())
+    ocrDedupDistance = RangeConfigItem("OCR", "DedupDistance", 16, RangeValidator(0, 64))
+    # folder ocr skips images with fewer text-like blocks than this without sending them to the server,
+    # 0 disables the prefilter
+    ocrPrefilterMinBlocks = RangeConfigItem("OCR", "PrefilterMinBlocks", 0, RangeValidator(0, 100))
+
 
 YEAR = 2023
 AUTHOR = "zhiyiYo"
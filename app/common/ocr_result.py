@@ -0,0 +1,125 @@
+# coding: utf-8
+import numpy as np
+
+
+class OcrResult:
+    """
+    列式存储的一张图片的识别结果。
+
+    - boxes: N x 4 x 2 的 int32 数组，每行文字的四个顶点
+    - confidences: 长度为 N 的 float64 数组
+    - texts: 长度为 N 的字符串列表
+
+    按下标或迭代访问时临时构造 {'text', 'confidence', 'text_region'} 字典，
+    与原先 format_ocr_result 返回的列表用法相同。
+    """
+
+    __slots__ = ('texts', 'confidences', 'boxes')
+
+    def __init__(self, texts=(), confidences=(), boxes=None):
+        self.texts = list(texts)
+        self.confidences = np.asarray(confidences, dtype=np.float64).reshape(-1)
+        if boxes is None:
+            boxes = np.zeros((0, 4, 2), dtype=np.int32)
+        self.boxes = np.rint(np.asarray(boxes, dtype=np.float64)).astype(np.int32).reshape(-1, 4, 2)
+        if not len(self.texts) == len(self.confidences) == len(self.boxes):
+            raise ValueError("texts, confidences and boxes must have the same length")
+
+    @classmethod
+    def from_raw(cls, raw):
+        """
+        由服务端返回的原始结构构造，每一项为 [(text, confidence), text_region]。
+        """
+        return cls(
+            [item[0][0] for item in raw],
+            [item[0][1] for item in raw],
+            [_to_quad(item[1]) for item in raw]
+        )
+
+    @classmethod
+    def from_items(cls, items):
+        """ 由 {'text', 'confidence', 'text_region'} 字典列表构造 """
+        if isinstance(items, OcrResult):
+            return items
+        items = list(items)
+        return cls(
+            [item['text'] for item in items],
+            [item['confidence'] for item in items],
+            [_to_quad(item['text_region']) for item in items]
+        )
+
+    @classmethod
+    def concat(cls, results):
+        """ 把多个结果按顺序拼接成一个 """
+        results = [cls.from_items(result) for result in results]
+        if not results:
+            return cls()
+        return cls(
+            [text for result in results for text in result.texts],
+            np.concatenate([result.confidences for result in results]),
+            np.concatenate([result.boxes for result in results])
+        )
+
+    def __len__(self):
+        return len(self.texts)
+
+    def __bool__(self):
+        return bool(self.texts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.subset(range(len(self))[index])
+        return {
+            'text': self.texts[index],
+            'confidence': float(self.confidences[index]),
+            'text_region': self.boxes[index].tolist()
+        }
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __eq__(self, other):
+        if isinstance(other, (list, tuple)):
+            other = OcrResult.from_items(other)
+        if not isinstance(other, OcrResult):
+            return NotImplemented
+        return (self.texts == other.texts and np.array_equal(self.confidences, other.confidences)
+                and np.array_equal(self.boxes, other.boxes))
+
+    def __repr__(self):
+        return "OcrResult({!r})".format(self.to_list())
+
+    def to_list(self):
+        """ 转换为 format_ocr_result 原先的字典列表，可以直接序列化为 JSON """
+        return list(self)
+
+    def rects(self):
+        """ 各文本框的外接矩形，N x 4 数组 (left, top, right, bottom) """
+        return np.concatenate([self.boxes.min(axis=1), self.boxes.max(axis=1)], axis=1)
+
+    def subset(self, indices):
+        """ 按下标选取若干行，返回新的结果 """
+        indices = np.asarray(indices, dtype=np.intp).reshape(-1)
+        return OcrResult([self.texts[i] for i in indices], self.confidences[indices], self.boxes[indices])
+
+    def scaled(self, factor):
+        """ 坐标乘以 factor 后取整，返回新的结果。factor 也可以是 (x 方向, y 方向) 两个比例 """
+        if np.all(np.asarray(factor) == 1.0):
+            return self
+        return OcrResult(self.texts, self.confidences, self.boxes * factor)
+
+    def offset(self, dx, dy):
+        """ 坐标平移 (dx, dy)，返回新的结果 """
+        return OcrResult(self.texts, self.confidences, self.boxes + np.array([dx, dy], dtype=np.int32))
+
+
+def _to_quad(points):
+    """
+    文本框统一为四个顶点。检测模型输出多边形时退化为其外接矩形。
+    """
+    if len(points) == 4:
+        return points
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return [[min(xs), min(ys)], [max(xs), min(ys)], [max(xs), max(ys)], [min(xs), max(ys)]]
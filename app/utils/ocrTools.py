@@ -1,9 +1,236 @@
+import io
+import ast
+import re
+import json
 import base64
+import numpy as np
+from PIL import Image, ImageOps
+from ..common.ocr_result import OcrResult
+
+# Python 字符串字面量
+_PY_STRING = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")""", re.S)
+# numpy 标量的 repr，如 np.float32(0.98)
+_NP_SCALAR = re.compile(r"\b(?:np|numpy)\.\w+\(([^()\[\]\0]*)\)")
+_TRAILING_COMMA = re.compile(r",(\s*\])")
+_PY_CONSTANTS = re.compile(r"\b(True|False|None|inf|nan)\b")
+_JSON_CONSTANTS = {'True': 'true', 'False': 'false', 'None': 'null', 'inf': 'Infinity', 'nan': 'NaN'}
+_BRACKETS = str.maketrans('()', '[]')
+
 
 def cv2_to_base64(image):
     return base64.b64encode(image).decode('utf8')
 
 
+def _py_string_to_json(literal):
+    if '\\' not in literal and (literal[0] == '"' or '"' not in literal):
+        return '"' + literal[1:-1] + '"'
+    return json.dumps(ast.literal_eval(literal), ensure_ascii=False)
+
+
+def decode_ocr_result(value):
+    """
+    解析 Paddle Serving 返回的识别结果字符串(由列表、元组、字符串和数字组成的 Python 字面量)。
+    先把它改写成 JSON 再交给 json.loads，不会执行其中的任何代码。
+    :param value: 响应中 result["value"] 的一项。
+    :return: 与 eval(value) 结构相同的列表，元组以列表表示。
+    """
+    pieces = _PY_STRING.split(value)
+    # 偶数位是字符串之外的部分，拼在一起一次性改写
+    outside = '\0'.join(pieces[0::2])
+    # 正则替换较慢，只在确实出现相应内容时才做
+    if 'np.' in outside or 'numpy.' in outside:
+        outside = _NP_SCALAR.sub(r'\1', outside)
+    outside = _TRAILING_COMMA.sub(r'\1', outside.translate(_BRACKETS))
+    if any(name in outside for name in _JSON_CONSTANTS):
+        outside = _PY_CONSTANTS.sub(lambda m: _JSON_CONSTANTS[m.group(1)], outside)
+
+    pieces[0::2] = outside.split('\0')
+    pieces[1::2] = [_py_string_to_json(literal) for literal in pieces[1::2]]
+    return json.loads(''.join(pieces))
+
+
+def downscale_image(image_data, max_side, quality=90):
+    """
+    把最长边超过 max_side 的图片缩小并重新编码为 JPEG。
+    先按 EXIF 方向摆正，与服务端解码原图时看到的方向一致。
+    :param image_data: 图片字节数据。
+    :param max_side: 最长边上限(像素)。
+    :param quality: JPEG 编码质量。
+    :return: (新的图片字节数据, 缩放比例)，无需缩小或无法解码时原样返回且比例为 1.0，
+             无法解码的图片交给服务端报错。
+    """
+    try:
+        with Image.open(io.BytesIO(image_data)) as img:
+            if max(img.size) <= max_side:
+                return image_data, 1.0
+
+            img = ImageOps.exif_transpose(img)
+            scale = max_side / max(img.size)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.convert('RGB') if img.mode not in ('RGB', 'L') else img
+            img = img.resize(size, Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return image_data, 1.0
+    return buffer.getvalue(), scale
+
+
+def scale_ocr_result(ocr_result, factor):
+    """
+    把识别结果中的 text_region 坐标乘以 factor 并取整，返回新的 OcrResult。
+    """
+    return OcrResult.from_items(ocr_result).scaled(factor)
+
+
+def make_tiles(width, height, tile_size, overlap):
+    """
+    把 width x height 的图片切成相互重叠的块。
+    :return: [(left, top, right, bottom), ...]
+    """
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        step = tile_size - overlap
+        positions = list(range(0, length - tile_size, step))
+        # 最后一块贴齐右/下边缘
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        (left, top, min(left + tile_size, width), min(top + tile_size, height))
+        for top in starts(height) for left in starts(width)
+    ]
+
+
+def offset_ocr_result(ocr_result, dx, dy):
+    """ 把识别结果中的 text_region 坐标平移 (dx, dy)，返回新的 OcrResult """
+    return OcrResult.from_items(ocr_result).offset(dx, dy)
+
+
+def merge_ocr_boxes(ocr_result, threshold=0.5, cell_size=256):
+    """
+    去除重叠区域中重复识别的文本框。
+    两个框外接矩形的交集占较小者面积的比例超过 threshold 时视为重复，保留面积较大(更完整)的，
+    面积相同时保留置信度高的。用网格索引查找相邻的框，避免两两比较。
+    :return: 保留下来的行组成的 OcrResult，按从上到下、从左到右排序。
+    """
+    ocr_result = OcrResult.from_items(ocr_result)
+    rects = ocr_result.rects().tolist()
+    areas = [(r[2] - r[0]) * (r[3] - r[1]) for r in rects]
+    # 面积大的优先，面积相同时置信度高的优先
+    order = np.lexsort((-ocr_result.confidences, -np.asarray(areas, dtype=np.int64)))
+
+    grid = {}
+    kept = []
+    for i in order.tolist():
+        rect, area = rects[i], areas[i]
+        cells = [
+            (cx, cy)
+            for cx in range(int(rect[0] // cell_size), int(rect[2] // cell_size) + 1)
+            for cy in range(int(rect[1] // cell_size), int(rect[3] // cell_size) + 1)
+        ]
+        duplicate = False
+        for cell in cells:
+            for kept_rect in grid.get(cell, ()):
+                w = min(rect[2], kept_rect[2]) - max(rect[0], kept_rect[0])
+                h = min(rect[3], kept_rect[3]) - max(rect[1], kept_rect[1])
+                if w > 0 and h > 0 and w * h > threshold * max(area, 1):
+                    duplicate = True
+                    break
+            if duplicate:
+                break
+        if duplicate:
+            continue
+
+        kept.append(i)
+        for cell in cells:
+            grid.setdefault(cell, []).append(rect)
+
+    kept.sort(key=lambda i: (rects[i][1], rects[i][0]))
+    return ocr_result.subset(kept)
+
+
+def _dhash_bits(img, hash_size):
+    """ 灰度图的 dHash 值：缩小为 (hash_size + 1) x hash_size，比较每行相邻像素的明暗 """
+    small = np.asarray(img.resize((hash_size + 1, hash_size), Image.BILINEAR, reducing_gap=2.0), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def _open_gray(image_data, draft_side):
+    """
+    打开图片并按 EXIF 方向摆正后转为灰度，JPEG 以不小于 draft_side 的尺寸直接缩小解码。
+    :return: (灰度图, 摆正后的原图尺寸)
+    """
+    with Image.open(io.BytesIO(image_data)) as img:
+        orientation = img.getexif().get(0x0112, 1)
+        size = img.size if orientation < 5 else img.size[::-1]
+        img.draft('L', (draft_side, draft_side))
+        return ImageOps.exif_transpose(img).convert('L'), size
+
+
+def dhash(image_data, hash_size=16):
+    """
+    计算图片的差异哈希(dHash)：缩小为 (hash_size + 1) x hash_size 的灰度图，比较每行相邻像素的明暗。
+    重新保存、重新压缩或等比缩放过的图片哈希值几乎相同。JPEG 直接以缩小的尺寸解码。
+    :param image_data: 图片字节数据。
+    :param hash_size: 哈希的边长，哈希共 hash_size * hash_size 位。
+    :return: (哈希值, (宽, 高))，宽高为按 EXIF 方向摆正后的原图尺寸。
+    """
+    img, size = _open_gray(image_data, hash_size * 8)
+    return _dhash_bits(img, hash_size), size
+
+
+def dhash_with_thumbnail(image_data, hash_size=16, side=512):
+    """
+    只解码一次，同时计算 dHash 和 side x side 的灰度缩略图(不保持宽高比，每个像素是原图对应区域的平均值)，
+    缩略图用于逐像素比较两张图片。
+    :return: (哈希值, (宽, 高), uint8 缩略图数组)。
+    """
+    img, size = _open_gray(image_data, max(side, hash_size * 8))
+    thumbnail = np.asarray(img.resize((side, side), Image.BOX), dtype=np.uint8)
+    return _dhash_bits(img, hash_size), size, thumbnail
+
+
+def text_block_count(image_data, edge_threshold=48, block=8, strip_blocks=64):
+    """
+    估计图片中是否有文字：按原始分辨率把灰度图分成 block x block 的块，统计像文字的块数。
+    文字笔画对比度高且横竖边缘同时存在，像文字的块需要强边缘足够密集，并且水平、垂直方向的强边缘都有。
+    图片不缩小，大尺寸截图中只有一行小字时也能计入；按 strip_blocks 个块高的横条逐段计算以限制内存。
+    纯色、渐变、虚化的照片通常为 0；纹理很密的照片也可能被计入，只会照常识别，不会漏掉文字。
+    :param image_data: 图片字节数据。
+    :param edge_threshold: 相邻像素灰度差超过该值才算强边缘。
+    :param block: 分块的边长(像素)。
+    :param strip_blocks: 每段横条的高度(块数)。
+    :return: 像文字的块数。
+    """
+    with Image.open(io.BytesIO(image_data)) as img:
+        img = ImageOps.exif_transpose(img).convert('L')
+        pixels = np.asarray(img, dtype=np.uint8)
+
+    count = 0
+    strip = block * strip_blocks
+    for top in range(0, pixels.shape[0] - 1, strip):
+        # 多取一行，跨越横条边界的垂直边缘也计入
+        part = pixels[top:top + strip + 1].astype(np.int16)
+        strong_x = np.abs(np.diff(part, axis=1))[:-1, :] > edge_threshold
+        strong_y = np.abs(np.diff(part, axis=0))[:, :-1] > edge_threshold
+        height = strong_x.shape[0] - strong_x.shape[0] % block
+        width = strong_x.shape[1] - strong_x.shape[1] % block
+        if not height or not width:
+            continue
+
+        def density(edges):
+            return edges[:height, :width].reshape(height // block, block, width // block, block).mean(axis=(1, 3))
+
+        density_x, density_y = density(strong_x), density(strong_y)
+        text_like = (density_x + density_y > 0.1) & (density_x > 0.02) & (density_y > 0.02)
+        count += int(np.count_nonzero(text_like))
+    return count
+
+
 def _check_image_file(path):
     img_end = {'jpg', 'bmp', 'png', 'jpeg', 'rgb', 'tif', 'tiff', 'gif'}
     return any([path.lower().endswith(e) for e in img_end])
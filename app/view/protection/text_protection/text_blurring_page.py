@@ -14,6 +14,8 @@ from ....utils.metadataTools import get_metadata, modify_metadata_and_save
 from ....components.graph_scene import GraphScene,GraphicsImageItem, GraphicsPolygonItem, GraphicsMosaicItem
 
 from ....api.paddle_ocr import perform_ocr
+from ....api.ocr_cache import get_ocr_cache
+from ....api.ocr_scheduler import INTERACTIVE
 
 
 class VisualizationArea(QWidget):
@@ -190,7 +192,7 @@ class TextBlurringPage(ScrollArea):
 
         file_path_list = []
         file_path_list.append(file_path)
-        self.ocr_results = perform_ocr(file_path_list)
+        self.ocr_results = perform_ocr(file_path_list, cache=get_ocr_cache(), priority=INTERACTIVE)
         self.visualizationArea.updateView(file_path, self.ocr_results[0]["ocr_result"])
         self.visualizationArea.updateText(self.ocr_results[0]["ocr_result"])
 
@@ -8,6 +8,13 @@ from PySide6.QtWidgets import QApplication
 from qfluentwidgets import FluentTranslator
 
 from app.common.config import cfg
+from app.api.ocr_backend import create_backend
+from app.api.paddle_ocr import set_ocr_client
+from app.api.ocr_cache import OcrCache, set_ocr_cache
+from app.api.ocr_dedup import PerceptualIndex, set_perceptual_index
+from app.api.ocr_prefilter import TextPrefilter, set_text_prefilter
+from app.api.ocr_scheduler import OcrScheduler, set_ocr_scheduler
+from app.api.ocr_limiter import AdaptiveLimiter, set_ocr_limiter
 from app.view.main_window import MainWindow
 
 
@@ -29,6 +36,36 @@ galleryTranslator.load(locale, "gallery", ".", ":/gallery/i18n")
 app.installTranslator(translator)
 app.installTranslator(galleryTranslator)
 
+# warm up ocr connection (or load local models) while the window is being created
+if cfg.get(cfg.ocrBackend) == "onnx":
+    ocrClient = create_backend(
+        "onnx", det_model=cfg.get(cfg.ocrDetModel), rec_model=cfg.get(cfg.ocrRecModel),
+        rec_dict=cfg.get(cfg.ocrRecDict), threads=cfg.get(cfg.ocrThreads) or None)
+else:
+    ocrEndpoints = [url.strip() for url in cfg.get(cfg.ocrEndpoint).split(',') if url.strip()]
+    ocrClient = create_backend(
+        "paddle_serving", url=ocrEndpoints, pool_size=cfg.get(cfg.ocrPoolSize),
+        connect_timeout=cfg.get(cfg.ocrConnectTimeout), read_timeout=cfg.get(cfg.ocrReadTimeout),
+        model_version=cfg.get(cfg.ocrModelVersion), max_side=cfg.get(cfg.ocrMaxSide) or None,
+        jpeg_quality=cfg.get(cfg.ocrJpegQuality), deadline=cfg.get(cfg.ocrDeadline) or None,
+        retries=cfg.get(cfg.ocrRetries), hedge=cfg.get(cfg.ocrHedgeEnabled))
+set_ocr_client(ocrClient)
+ocrClient.start_warm_up()
+
+# interactive and batch ocr jobs share the client through one fair-queuing scheduler
+set_ocr_scheduler(OcrScheduler(cfg.get(cfg.ocrPoolSize)))
+if cfg.get(cfg.ocrAdaptiveConcurrency):
+    set_ocr_limiter(AdaptiveLimiter(min(4, cfg.get(cfg.ocrPoolSize)), max_limit=cfg.get(cfg.ocrPoolSize)))
+
+if cfg.get(cfg.ocrCacheSize) > 0:
+    set_ocr_cache(OcrCache(cfg.get(cfg.ocrCacheFolder), cfg.get(cfg.ocrCacheSize) * 1024 * 1024))
+
+if cfg.get(cfg.ocrDedupEnabled):
+    set_perceptual_index(PerceptualIndex(cfg.get(cfg.ocrDedupDistance)))
+
+if cfg.get(cfg.ocrPrefilterMinBlocks) > 0:
+    set_text_prefilter(TextPrefilter(cfg.get(cfg.ocrPrefilterMinBlocks)))
+
 # create main window
 w = MainWindow()
 w.show()
@@ -0,0 +1,40 @@
+"""
+对比 eval 与 decode_ocr_result 解析 OCR 响应的耗时。
+
+    python -m tools.bench_ocr_decode --boxes 5000
+"""
+import argparse
+import random
+import timeit
+
+from app.utils.ocrTools import decode_ocr_result
+
+
+def make_value(boxes):
+    """ 生成与 Paddle Serving 响应格式相同的识别结果字符串 """
+    rng = random.Random(0)
+    result = []
+    for i in range(boxes):
+        x, y = rng.randint(0, 4000), rng.randint(0, 4000)
+        text = "line {} 文本 'quoted'".format(i) if i % 10 == 0 else "line {} text".format(i)
+        result.append([(text, rng.random()), [[x, y], [x + 200, y], [x + 200, y + 30], [x, y + 30]]])
+    return str(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--boxes', type=int, default=5000, help="每页文本框数量")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    value = make_value(args.boxes)
+    assert decode_ocr_result(value) == [[list(item[0]), item[1]] for item in eval(value)]
+
+    print("{} boxes, {:.1f} KiB".format(args.boxes, len(value) / 1024))
+    for name, func in (('eval', eval), ('decode_ocr_result', decode_ocr_result)):
+        seconds = min(timeit.repeat(lambda: func(value), number=1, repeat=args.repeat))
+        print("{:<20}{:>10.2f} ms".format(name, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+检查视频抽帧的跳帧判断：生成一段静止的录屏，中途在画面一角出现一行小字，
+出现文字的帧必须被送去识别，其余静止的帧都应跳过。
+
+    python -m tools.check_video_frames --size 1920x1080 --codec MJPG
+"""
+import argparse
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from app.api.video_ocr import iter_video_frames
+
+
+def write_clip(path, width, height, codec, fps=10, seconds=10, appear_at=5.0, font_scale=0.4):
+    """
+    写一段浅色背景、带几行固定文字的视频，从 appear_at 秒起在右下角多出一行小字。
+    :return: 出现新文字的第一帧序号。
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+    if not writer.isOpened():
+        raise OSError("cannot write video with codec {}".format(codec))
+    base = np.full((height, width, 3), 235, dtype=np.uint8)
+    for i in range(5):
+        cv2.putText(base, "build log line {}".format(i), (10, 20 + i * 18), cv2.FONT_HERSHEY_SIMPLEX, font_scale,
+                    (40, 40, 40), 1, cv2.LINE_AA)
+    changed = base.copy()
+    cv2.putText(changed, "password: hunter2-SECRET-TOKEN", (width // 2, height - 12), cv2.FONT_HERSHEY_SIMPLEX,
+                font_scale, (40, 40, 40), 1, cv2.LINE_AA)
+    first_changed = int(appear_at * fps)
+    for frame_index in range(fps * seconds):
+        writer.write(changed if frame_index >= first_changed else base)
+    writer.release()
+    return first_changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='1920x1080', help="视频尺寸，如 1920x1080")
+    parser.add_argument('--codec', default='MJPG', help="FourCC 编码，需与 .avi 容器兼容")
+    parser.add_argument('--font-scale', type=float, default=0.4, help="cv2.putText 的字号，0.4 约为 10 像素高")
+    args = parser.parse_args()
+
+    width, height = (int(value) for value in args.size.split('x'))
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'clip.avi')
+        first_changed = write_clip(path, width, height, args.codec, font_scale=args.font_scale)
+        frames = [frame.name[0] for frame in iter_video_frames(path)]
+
+    print("{}x{} {}: frames sent to OCR {}".format(width, height, args.codec, frames))
+    assert frames[0] == 0, "the first frame must always be recognised"
+    assert first_changed in frames, "the frame where the new text line appears was skipped"
+    assert len(frames) == 2, "static frames were not skipped"
+
+
+if __name__ == '__main__':
+    main()
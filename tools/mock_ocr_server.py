@@ -0,0 +1,169 @@
+"""
+本地模拟的 Paddle Serving OCR 服务，实现 /ocr/prediction 协议，用于在没有真实服务的机器上压测客户端。
+
+    python -m tools.mock_ocr_server --port 9998 --latency lognormal --latency-ms 80 --error-rate 0.01 --boxes 20-200
+"""
+import argparse
+import json
+import math
+import random
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'exponential', 'lognormal')
+
+
+class MockOcrConfig:
+    """
+    模拟服务的行为参数。
+    :param latency: 延迟分布，可选 fixed、uniform、exponential、lognormal。
+    :param latency_ms: 每张图片的平均延迟(毫秒)，批量请求按图片数累加。
+    :param sigma: lognormal 分布的形状参数，uniform 分布时为相对于均值的波动幅度。
+    :param stall_rate: 请求卡顿的概率。
+    :param stall_ms: 卡顿时额外增加的延迟(毫秒)。
+    :param error_rate: 返回 err_no != 0 的概率。
+    :param boxes: 每张图片返回的文本框数量范围 (最少, 最多)。
+    :param batch: 是否接受多图请求。官方的 pdserving 服务只识别 "image" 键对应的一张图片，
+                  默认与之一致，多图请求返回 err_no != 0。
+    """
+
+    def __init__(self, latency='fixed', latency_ms=50.0, sigma=0.5, stall_rate=0.0, stall_ms=2000.0,
+                 error_rate=0.0, boxes=(10, 10), seed=None, batch=False):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError("unknown latency distribution: {}".format(latency))
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.stall_rate = stall_rate
+        self.stall_ms = stall_ms
+        self.error_rate = error_rate
+        self.boxes = boxes
+        self.batch = batch
+        self.random = random.Random(seed)
+
+    def sample_latency(self, images):
+        """ 返回处理 images 张图片的延迟(秒) """
+        mean = self.latency_ms * images
+        if self.latency == 'uniform':
+            ms = self.random.uniform(mean * (1 - self.sigma), mean * (1 + self.sigma))
+        elif self.latency == 'exponential':
+            ms = self.random.expovariate(1 / mean) if mean > 0 else 0
+        elif self.latency == 'lognormal':
+            # 使分布的均值等于 mean
+            ms = self.random.lognormvariate(math.log(mean) - self.sigma ** 2 / 2, self.sigma) if mean > 0 else 0
+        else:
+            ms = mean
+        if self.random.random() < self.stall_rate:
+            ms += self.stall_ms
+        return max(ms, 0) / 1000
+
+    def make_value(self):
+        """ 生成一张图片的识别结果字符串，格式与 Paddle Serving 相同 """
+        result = []
+        for i in range(self.random.randint(*self.boxes)):
+            x, y = self.random.randint(0, 2000), self.random.randint(0, 2000)
+            box = [[x, y], [x + 160, y], [x + 160, y + 24], [x, y + 24]]
+            result.append([('mock text {}'.format(i), round(self.random.uniform(0.5, 1.0), 6)), box])
+        return str(result)
+
+
+def _response_keys(count):
+    """ 官方服务把一张图片的结果放在 "result" 键中 """
+    if count == 1:
+        return ["result"]
+    return ["result_{}".format(i) for i in range(count)]
+
+
+class MockOcrHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和响应体分两次写出，不关闭 Nagle 算法会额外等待 40ms 左右的延迟确认
+    disable_nagle_algorithm = True
+    config = MockOcrConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, data):
+        body = json.dumps(data).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._send_json(405, {"err_no": 1, "err_msg": "Method Not Allowed"})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length))
+            keys, values = request["key"], request["value"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"err_no": 1, "err_msg": "malformed request"})
+            return
+
+        config = self.config
+        if not config.batch and keys != ["image"]:
+            self._send_json(200, {"err_no": 1, "err_msg": "KeyError: 'image'", "key": [], "value": []})
+            return
+        time.sleep(config.sample_latency(len(values)))
+
+        if config.random.random() < config.error_rate:
+            self._send_json(200, {"err_no": 1, "err_msg": "mock error", "key": [], "value": []})
+            return
+        self._send_json(200, {
+            "err_no": 0,
+            "err_msg": "",
+            "key": _response_keys(len(values)),
+            "value": [config.make_value() for _ in values]
+        })
+
+
+def make_server(host='127.0.0.1', port=9998, config=None):
+    """
+    创建模拟服务，port 为 0 时自动选择空闲端口，可通过 server.server_address 获取。
+    """
+    handler = type('Handler', (MockOcrHandler,), {'config': config or MockOcrConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def add_mock_arguments(parser):
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='fixed', help="延迟分布")
+    parser.add_argument('--latency-ms', type=float, default=50.0, help="每张图片的平均延迟(毫秒)")
+    parser.add_argument('--sigma', type=float, default=0.5, help="lognormal 形状参数 / uniform 波动幅度")
+    parser.add_argument('--stall-rate', type=float, default=0.0, help="请求卡顿的概率")
+    parser.add_argument('--stall-ms', type=float, default=2000.0, help="卡顿时额外的延迟(毫秒)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="返回 err_no != 0 的概率")
+    parser.add_argument('--boxes', default='10', help="每张图片的文本框数量，如 20 或 20-200")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--batch', action='store_true', help="接受多图请求(官方服务不支持)")
+
+
+def config_from_args(args):
+    low, _, high = args.boxes.partition('-')
+    return MockOcrConfig(args.latency, args.latency_ms, args.sigma, args.stall_rate, args.stall_ms,
+                         args.error_rate, (int(low), int(high or low)), args.seed, args.batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9998)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, config_from_args(args))
+    print("mock OCR server listening on http://{}:{}/ocr/prediction".format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
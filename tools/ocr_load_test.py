@@ -0,0 +1,139 @@
+"""
+以固定并发压测 OcrClient，输出吞吐量和 p50/p95/p99 延迟。
+
+    # 针对本地模拟服务
+    python -m tools.ocr_load_test --mock --latency lognormal --latency-ms 80 --concurrency 16 --requests 2000
+    # 针对真实服务
+    python -m tools.ocr_load_test --url http://127.0.0.1:9998/ocr/prediction --image 1.jpg --concurrency 8
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app.api.paddle_ocr import OcrClient, OcrError
+from app.api.ocr_metrics import STAGES, get_ocr_metrics
+from tools.mock_ocr_server import make_server, add_mock_arguments, config_from_args
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+
+def run_load_test(client, images, concurrency, total_requests, batch_size=1, duration=None):
+    """
+    用 concurrency 个线程循环调用 client.predict_batch，直到发出 total_requests 个请求或超过 duration 秒。
+    :return: 统计结果字典。
+    """
+    latencies = []
+    errors = {}
+    counter = iter(range(total_requests))
+    lock = threading.Lock()
+    start = time.monotonic()
+    stop_at = start + duration if duration else None
+
+    def worker():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None or (stop_at is not None and time.monotonic() >= stop_at):
+                return
+            batch = [images[(i * batch_size + j) % len(images)] for j in range(batch_size)]
+            begin = time.monotonic()
+            try:
+                client.predict_batch(batch)
+            except (OcrError, requests.RequestException, ValueError) as e:
+                with lock:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = time.monotonic() - begin
+            with lock:
+                latencies.append(elapsed)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    wall = time.monotonic() - start
+
+    latencies.sort()
+    succeeded = len(latencies)
+    return {
+        'concurrency': concurrency,
+        'batch_size': batch_size,
+        'requests': succeeded + sum(errors.values()),
+        'errors': errors,
+        'seconds': round(wall, 3),
+        'requests_per_second': round(succeeded / wall, 2),
+        'images_per_second': round(succeeded * batch_size / wall, 2),
+        'latency_ms': {
+            name: round(percentile(latencies, q) * 1000, 2) if latencies else None
+            for name, q in (('p50', 50), ('p95', 95), ('p99', 99))
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', action='append', help="OCR 服务地址，可重复指定多个")
+    parser.add_argument('--mock', action='store_true', help="在本进程中启动模拟服务并压测它")
+    parser.add_argument('--image', action='append', help="请求中使用的图片，可重复指定，默认使用 1KiB 的占位数据")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=None, help="最长压测时间(秒)")
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--hedge', action='store_true')
+    parser.add_argument('--json', action='store_true', help="以 JSON 输出结果")
+    parser.add_argument('--metrics', metavar='FILE', help="把各阶段的耗时、大小统计写入 JSON 文件")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    urls = args.url or []
+    if args.mock:
+        server = make_server(port=0, config=config_from_args(args))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        urls.append("http://{}:{}/ocr/prediction".format(*server.server_address))
+    if not urls:
+        parser.error("either --url or --mock is required")
+
+    images = []
+    for path in args.image or []:
+        with open(path, 'rb') as file:
+            images.append(file.read())
+    images = images or [bytes(1024)]
+
+    client = OcrClient(urls, pool_size=args.concurrency, hedge=args.hedge)
+    metrics = get_ocr_metrics()
+    metrics.reset()
+    try:
+        report = run_load_test(client, images, args.concurrency, args.requests, args.batch_size, args.duration)
+    finally:
+        client.close()
+        if server is not None:
+            server.shutdown()
+
+    if args.metrics:
+        metrics.dump(args.metrics)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    latency = report['latency_ms']
+    print("{requests} requests in {seconds}s, concurrency {concurrency}, batch size {batch_size}".format(**report))
+    print("throughput: {requests_per_second} req/s, {images_per_second} images/s".format(**report))
+    print("latency: p50 {p50} ms, p95 {p95} ms, p99 {p99} ms".format(**latency))
+    for stage in STAGES:
+        histogram = metrics.histogram(stage)
+        if histogram is not None:
+            print("  {:<10} total {:9.1f} ms, p50 {:8.3f} ms, p99 {:8.3f} ms".format(
+                stage, histogram.sum * 1000, histogram.percentile(50) * 1000, histogram.percentile(99) * 1000))
+    if report['errors']:
+        print("errors: {}".format(report['errors']))
+
+
+if __name__ == '__main__':
+    main()